@@ -188,7 +188,12 @@ def create_app(config_name=None):
     # Health check
     @app.route('/health', methods=['GET'])
     def health_check():
-        return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
+        return jsonify({
+            'status': 'healthy',
+            'timestamp': datetime.utcnow().isoformat(),
+            # Pool usage snapshot for tuning DB_POOL_SIZE / DB_MAX_OVERFLOW
+            'db_pool': db.engine.pool.status()
+        })
     
     # ===============================
     # Authentication Routes
@@ -0,0 +1,22 @@
+"""
+Campaign Daily Send Counter Migration
+Adds a denormalized per-day sent counter to campaigns so daily limits can be
+checked without counting message history
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    """Apply migration changes"""
+    
+    with op.batch_alter_table('campaigns', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('messages_sent_today', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('messages_sent_day', sa.Date(), nullable=True))
+
+def downgrade():
+    """Revert migration changes"""
+    
+    with op.batch_alter_table('campaigns', schema=None) as batch_op:
+        batch_op.drop_column('messages_sent_day')
+        batch_op.drop_column('messages_sent_today')
@@ -0,0 +1,34 @@
+"""
+Campaign Composite Indexes Migration
+Adds composite indexes backing the per-campaign status, sent-date and
+sentiment filters used by sending and analytics
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    """Apply migration changes"""
+    
+    with op.batch_alter_table('campaign_targets', schema=None) as batch_op:
+        batch_op.create_index('ix_ct_campaign_status', ['campaign_id', 'status'])
+    
+    with op.batch_alter_table('campaign_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_cm_campaign_status_sent', ['campaign_id', 'status', 'sent_at'])
+    
+    with op.batch_alter_table('direct_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_dm_campaign_status_sent', ['campaign_id', 'status', 'sent_at'])
+        batch_op.create_index('ix_dm_campaign_type_sentiment', ['campaign_id', 'message_type', 'sentiment'])
+
+def downgrade():
+    """Revert migration changes"""
+    
+    with op.batch_alter_table('direct_messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_dm_campaign_type_sentiment')
+        batch_op.drop_index('ix_dm_campaign_status_sent')
+    
+    with op.batch_alter_table('campaign_messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_cm_campaign_status_sent')
+    
+    with op.batch_alter_table('campaign_targets', schema=None) as batch_op:
+        batch_op.drop_index('ix_ct_campaign_status')
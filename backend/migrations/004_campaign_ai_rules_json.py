@@ -0,0 +1,31 @@
+"""
+Campaign AI Rules JSON Migration
+Converts campaigns.ai_rules from a serialized text column to a native JSON
+column (JSONB on PostgreSQL)
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+def upgrade():
+    """Apply migration changes"""
+    
+    with op.batch_alter_table('campaigns', schema=None) as batch_op:
+        batch_op.alter_column(
+            'ai_rules',
+            existing_type=sa.Text(),
+            type_=sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'),
+            postgresql_using='ai_rules::jsonb'
+        )
+
+def downgrade():
+    """Revert migration changes"""
+    
+    with op.batch_alter_table('campaigns', schema=None) as batch_op:
+        batch_op.alter_column(
+            'ai_rules',
+            existing_type=sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'),
+            type_=sa.Text(),
+            postgresql_using='ai_rules::text'
+        )
@@ -0,0 +1,51 @@
+"""
+Campaign Target Unique User Migration
+Adds a unique index on (campaign_id, twitter_user_id) so duplicate targets
+are rejected by the database instead of a pre-insert lookup
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# A target is a duplicate when the same campaign has a target with the
+# same twitter_user_id and a lower id; the lowest id is the one kept
+DUPLICATE_TARGET_IDS = """
+    SELECT dup.id FROM campaign_targets dup
+    WHERE EXISTS (
+        SELECT 1 FROM campaign_targets keep
+        WHERE keep.campaign_id = dup.campaign_id
+          AND keep.twitter_user_id = dup.twitter_user_id
+          AND keep.id < dup.id
+    )
+"""
+
+# Tables whose target_id has to move to the kept target before the
+# duplicates can be deleted
+TARGET_REFERENCES = ('campaign_messages', 'direct_messages')
+
+def upgrade():
+    """Apply migration changes"""
+    
+    # The old check-then-insert dedup could race, so existing databases may
+    # already hold duplicates that would make the unique index fail
+    for table in TARGET_REFERENCES:
+        op.execute(f"""
+            UPDATE {table} SET target_id = (
+                SELECT MIN(keep.id) FROM campaign_targets keep
+                JOIN campaign_targets dup
+                  ON keep.campaign_id = dup.campaign_id
+                 AND keep.twitter_user_id = dup.twitter_user_id
+                WHERE dup.id = {table}.target_id
+            )
+            WHERE target_id IN ({DUPLICATE_TARGET_IDS})
+        """)
+    op.execute(f"DELETE FROM campaign_targets WHERE id IN ({DUPLICATE_TARGET_IDS})")
+    
+    with op.batch_alter_table('campaign_targets', schema=None) as batch_op:
+        batch_op.create_index('ux_ct_campaign_twitter_user', ['campaign_id', 'twitter_user_id'], unique=True)
+
+def downgrade():
+    """Revert migration changes"""
+    
+    with op.batch_alter_table('campaign_targets', schema=None) as batch_op:
+        batch_op.drop_index('ux_ct_campaign_twitter_user')
@@ -0,0 +1,30 @@
+"""
+API Call Log Indexes Migration
+Adds an is_dm flag so DM analytics can filter without a leading-wildcard
+LIKE on endpoint, and composite indexes for the analytics date-range filters
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    """Apply migration changes"""
+    
+    with op.batch_alter_table('api_call_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_dm', sa.Boolean(), nullable=True, server_default=sa.false()))
+    
+    op.execute("UPDATE api_call_logs SET is_dm = (LOWER(endpoint) LIKE '%dm%')")
+    
+    with op.batch_alter_table('api_call_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_apicall_dm_created', ['is_dm', 'created_at'])
+        batch_op.create_index('ix_apicall_campaign_created', ['campaign_id', 'created_at'])
+        batch_op.create_index('ix_apicall_success_created', ['success', 'created_at'])
+
+def downgrade():
+    """Revert migration changes"""
+    
+    with op.batch_alter_table('api_call_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_apicall_success_created')
+        batch_op.drop_index('ix_apicall_campaign_created')
+        batch_op.drop_index('ix_apicall_dm_created')
+        batch_op.drop_column('is_dm')
@@ -0,0 +1,20 @@
+"""
+Twitter Account User Index Migration
+Adds a composite index on (user_id, twitter_user_id) for the duplicate
+account check run whenever an account is added
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    """Apply migration changes"""
+    
+    with op.batch_alter_table('twitter_accounts', schema=None) as batch_op:
+        batch_op.create_index('ix_twitter_accounts_user_twuid', ['user_id', 'twitter_user_id'])
+
+def downgrade():
+    """Revert migration changes"""
+    
+    with op.batch_alter_table('twitter_accounts', schema=None) as batch_op:
+        batch_op.drop_index('ix_twitter_accounts_user_twuid')
@@ -0,0 +1,20 @@
+"""
+Campaign Target Claim Lease Migration
+Adds claimed_at so targets left in_progress by a sender that died can be
+returned to pending once their claim lease runs out
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+def upgrade():
+    """Apply migration changes"""
+    
+    with op.batch_alter_table('campaign_targets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+def downgrade():
+    """Revert migration changes"""
+    
+    with op.batch_alter_table('campaign_targets', schema=None) as batch_op:
+        batch_op.drop_column('claimed_at')
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import JSONB
 from werkzeug.security import generate_password_hash, check_password_hash
-import json
 
 db = SQLAlchemy()
 
@@ -51,6 +51,9 @@ class User(db.Model):
 class TwitterAccount(db.Model):
     """Twitter account model for connecting user's X accounts"""
     __tablename__ = 'twitter_accounts'
+    __table_args__ = (
+        db.Index('ix_twitter_accounts_user_twuid', 'user_id', 'twitter_user_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -135,7 +138,7 @@ class Campaign(db.Model):
     # Message Configuration
     message_template = db.Column(db.Text, nullable=False)
     personalization_enabled = db.Column(db.Boolean, default=True)
-    ai_rules = db.Column(db.Text)  # JSON string of AI rules and instructions
+    ai_rules = db.Column(db.JSON().with_variant(JSONB, 'postgresql'))  # AI rules and instructions
     preview_message = db.Column(db.Text)
     
     # Campaign Settings
@@ -150,6 +153,8 @@ class Campaign(db.Model):
     replies_received = db.Column(db.Integer, default=0)
     positive_replies = db.Column(db.Integer, default=0)
     negative_replies = db.Column(db.Integer, default=0)
+    messages_sent_today = db.Column(db.Integer, default=0)  # Reset when messages_sent_day rolls over (UTC)
+    messages_sent_day = db.Column(db.Date)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -163,6 +168,11 @@ class Campaign(db.Model):
     messages = db.relationship('DirectMessage', backref='campaign', cascade='all, delete-orphan')
     campaign_messages = db.relationship('CampaignMessage', backref='campaign', cascade='all, delete-orphan')
     
+    @property
+    def ai_rules_parsed(self):
+        """AI rules as a dict ({} when unset); the JSON column is decoded by the driver"""
+        return self.ai_rules or {}
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -171,7 +181,7 @@ class Campaign(db.Model):
             'status': self.status,
             'target_type': self.target_type,
             'target_identifier': self.target_identifier,
-            'ai_rules': json.loads(self.ai_rules) if self.ai_rules else {},
+            'ai_rules': self.ai_rules_parsed,
             'message_template': self.message_template,
             'personalization_enabled': self.personalization_enabled,
             'total_targets': self.total_targets,
@@ -189,6 +199,10 @@ class Campaign(db.Model):
 class CampaignTarget(db.Model):
     """Target users for campaigns"""
     __tablename__ = 'campaign_targets'
+    __table_args__ = (
+        db.Index('ix_ct_campaign_status', 'campaign_id', 'status'),
+        db.Index('ux_ct_campaign_twitter_user', 'campaign_id', 'twitter_user_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=False, index=True)
@@ -209,7 +223,8 @@ class CampaignTarget(db.Model):
     source = db.Column(db.String(20), default='scraped')  # scraped, csv_upload
     
     # Processing Status
-    status = db.Column(db.String(20), default='pending', index=True)  # pending, sent, failed, replied
+    status = db.Column(db.String(20), default='pending', index=True)  # pending, in_progress, sent, failed, replied
+    claimed_at = db.Column(db.DateTime)  # When a sender claimed the target (lease for in_progress)
     error_message = db.Column(db.Text)
     message_sent_at = db.Column(db.DateTime)
     reply_received_at = db.Column(db.DateTime)
@@ -244,6 +259,9 @@ class CampaignTarget(db.Model):
 class CampaignMessage(db.Model):
     """Campaign message tracking model"""
     __tablename__ = 'campaign_messages'
+    __table_args__ = (
+        db.Index('ix_cm_campaign_status_sent', 'campaign_id', 'status', 'sent_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=False, index=True)
@@ -284,6 +302,10 @@ class CampaignMessage(db.Model):
 class DirectMessage(db.Model):
     """Direct messages sent and received"""
     __tablename__ = 'direct_messages'
+    __table_args__ = (
+        db.Index('ix_dm_campaign_status_sent', 'campaign_id', 'status', 'sent_at'),
+        db.Index('ix_dm_campaign_type_sentiment', 'campaign_id', 'message_type', 'sentiment'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=False)
@@ -376,12 +398,18 @@ class APIUsage(db.Model):
 class APICallLog(db.Model):
     """Log all twitterapi.io API calls for monitoring and analytics"""
     __tablename__ = 'api_call_logs'
+    __table_args__ = (
+        db.Index('ix_apicall_dm_created', 'is_dm', 'created_at'),
+        db.Index('ix_apicall_campaign_created', 'campaign_id', 'created_at'),
+        db.Index('ix_apicall_success_created', 'success', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     twitter_account_id = db.Column(db.Integer, db.ForeignKey('twitter_accounts.id'))
     campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'))
     endpoint = db.Column(db.String(100), nullable=False)
+    is_dm = db.Column(db.Boolean, default=False)  # endpoint is DM-related, set when logged
     method = db.Column(db.String(10), nullable=False)  # GET, POST, etc.
     status_code = db.Column(db.Integer)
     response_time_ms = db.Column(db.Integer)
@@ -7,6 +7,7 @@ from flask import Flask
 
 from app import create_app
 from services.campaign_service import CampaignService
+from services.bulk_dm_service import BulkDMService
 from services.warmup_service import WarmupService
 from models import db, Campaign
 
@@ -18,15 +19,19 @@ class BackgroundScheduler:
     def __init__(self):
         self.app = create_app()
         self.campaign_service = CampaignService()
+        self.bulk_dm_service = BulkDMService()
         self.warmup_service = WarmupService()
         self.running = False
         self.thread = None
+        self._job_threads = {}
     
     def setup_schedules(self):
         """Setup all scheduled tasks"""
         
-        # Campaign processing - every 30 minutes
-        schedule.every(30).minutes.do(self.process_active_campaigns)
+        # Campaign processing - every 30 minutes. Sends wait 30-120 s
+        # between DMs, so they run on their own thread instead of holding
+        # up the other jobs.
+        schedule.every(30).minutes.do(self._run_in_background, self.process_active_campaigns)
         
         # Warmup activities - every 15 minutes
         schedule.every(15).minutes.do(self.execute_warmup_activities)
@@ -39,6 +44,17 @@ class BackgroundScheduler:
         
         logger.info("Background tasks scheduled successfully")
     
+    def _run_in_background(self, job):
+        """Run a job on its own thread, skipping it while its previous run is still going"""
+        previous = self._job_threads.get(job.__name__)
+        if previous and previous.is_alive():
+            logger.warning(f"Skipping {job.__name__}: previous run is still in progress")
+            return
+        
+        thread = threading.Thread(target=job, name=job.__name__, daemon=True)
+        self._job_threads[job.__name__] = thread
+        thread.start()
+    
     def process_active_campaigns(self):
         """Process messages for active campaigns"""
         try:
@@ -53,19 +69,24 @@ class BackgroundScheduler:
                 
                 for campaign in active_campaigns:
                     try:
-                        success, result = self.campaign_service.process_campaign_messages(
-                            campaign.id, 
-                            batch_size=5  # Process 5 messages per campaign per run
+                        # Another sender (a manual start or retry) is already
+                        # working through this campaign's targets
+                        if self.bulk_dm_service.has_live_claims(campaign.id):
+                            continue
+                        
+                        # Campaigns that hit their daily limit are still
+                        # active and pick up again here after the UTC rollover
+                        result = self.bulk_dm_service.start_campaign_sending(
+                            campaign.id,
+                            max_targets=5  # Process 5 messages per campaign per run
                         )
                         
-                        if success:
-                            processed = result.get('processed', 0)
-                            errors = len(result.get('errors', []))
-                            total_processed += processed
-                            total_errors += errors
-                            
-                            if processed > 0:
-                                logger.info(f"Campaign {campaign.id}: processed {processed} messages")
+                        processed = result.sent_count + result.failed_count
+                        total_processed += processed
+                        total_errors += result.failed_count
+                        
+                        if processed > 0:
+                            logger.info(f"Campaign {campaign.id}: processed {processed} messages")
                         
                     except Exception as e:
                         logger.error(f"Error processing campaign {campaign.id}: {str(e)}")
@@ -138,10 +159,14 @@ class BackgroundScheduler:
             active_campaigns = Campaign.query.filter_by(status='active').all()
             
             for campaign in active_campaigns:
-                # Check if all targets are processed
-                pending_targets = CampaignTarget.query.filter_by(
-                    campaign_id=campaign.id,
-                    status='pending'
+                # Check if all targets are processed (claimed targets are
+                # still being worked on by a sender). Targets that can't be
+                # DMed are never sent, so like start_campaign_sending they
+                # don't keep the campaign open.
+                pending_targets = CampaignTarget.query.filter(
+                    CampaignTarget.campaign_id == campaign.id,
+                    CampaignTarget.status.in_(['pending', 'in_progress']),
+                    CampaignTarget.can_dm == True
                 ).count()
                 
                 if pending_targets == 0:
@@ -7,11 +7,14 @@ import logging
 import time
 import re
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Iterable
 from dataclasses import dataclass
+from itertools import islice
 from threading import Lock
 import json
 
+from sqlalchemy import insert, update, text, or_
+
 try:
     from ..models import db, Campaign, CampaignTarget, CampaignMessage, TwitterAccount
     from ..twitterio.dm import TwitterDMClient, DMSendResult, TwitterAPIError
@@ -24,6 +27,14 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Number of pending targets loaded per query while sending
+TARGET_CHUNK_SIZE = 50
+
+# How long a sender's claim on its targets lasts without being renewed.
+# Targets left in_progress past this (the sender crashed or was killed)
+# are put back to pending by the next run.
+TARGET_CLAIM_LEASE = timedelta(minutes=30)
+
 @dataclass
 class BulkDMProgress:
     """Progress tracking for bulk DM operations"""
@@ -52,7 +63,8 @@ class BulkDMResult:
 class RateLimiter:
     """Rate limiter for DM sending operations"""
     
-    def __init__(self, daily_limit: int = 50, delay_min: int = 30, delay_max: int = 120):
+    def __init__(self, daily_limit: int = 50, delay_min: int = 30, delay_max: int = 120,
+                 sent_today: int = 0):
         """
         Initialize rate limiter
         
@@ -60,22 +72,24 @@ class RateLimiter:
             daily_limit: Maximum DMs per day
             delay_min: Minimum delay between DMs in seconds
             delay_max: Maximum delay between DMs in seconds
+            sent_today: DMs already sent today before this limiter was created
         """
         self.daily_limit = daily_limit
         self.delay_min = delay_min
         self.delay_max = delay_max
-        self.sent_today = 0
+        self.sent_today = sent_today
         self.last_sent_time = None
-        self.daily_reset_time = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.daily_reset_time = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
         self._lock = Lock()
     
     def can_send(self) -> bool:
         """Check if we can send a DM now"""
         with self._lock:
-            # Reset daily counter if it's a new day
-            if datetime.now() >= self.daily_reset_time:
+            # Reset daily counter if it's a new day. Days roll over at UTC
+            # midnight, the same as the campaign's daily send counter.
+            if datetime.utcnow() >= self.daily_reset_time:
                 self.sent_today = 0
-                self.daily_reset_time = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+                self.daily_reset_time = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
             
             # Check daily limit (allow sending up to the limit, not after reaching it)
             if self.sent_today >= self.daily_limit:
@@ -83,7 +97,7 @@ class RateLimiter:
             
             # Check time delay
             if self.last_sent_time:
-                time_since_last = (datetime.now() - self.last_sent_time).total_seconds()
+                time_since_last = (datetime.utcnow() - self.last_sent_time).total_seconds()
                 if time_since_last < self.delay_min:
                     return False
             
@@ -94,11 +108,11 @@ class RateLimiter:
         with self._lock:
             # Check if we need to wait for daily reset
             if self.sent_today >= self.daily_limit:
-                return int((self.daily_reset_time - datetime.now()).total_seconds())
+                return int((self.daily_reset_time - datetime.utcnow()).total_seconds())
             
             # Check time delay
             if self.last_sent_time:
-                time_since_last = (datetime.now() - self.last_sent_time).total_seconds()
+                time_since_last = (datetime.utcnow() - self.last_sent_time).total_seconds()
                 if time_since_last < self.delay_min:
                     return int(self.delay_min - time_since_last)
             
@@ -108,7 +122,7 @@ class RateLimiter:
         """Record that a DM was sent"""
         with self._lock:
             self.sent_today += 1
-            self.last_sent_time = datetime.now()
+            self.last_sent_time = datetime.utcnow()
 
 class MessagePersonalizer:
     """Handles message personalization using target data"""
@@ -183,12 +197,18 @@ class BulkDMService:
         self.progress_cache = {}  # Store progress for active campaigns
         self._lock = Lock()
     
-    def start_campaign_sending(self, campaign_id: int) -> BulkDMResult:
+    def start_campaign_sending(self, campaign_id: int, max_targets: Optional[int] = None) -> BulkDMResult:
         """
         Start sending DMs for a campaign
         
+        Active campaigns can be started again: a campaign that stopped at
+        its daily limit stays active and the next run carries on once the
+        UTC day rolls over.
+        
         Args:
             campaign_id: Campaign ID to process
+            max_targets: Optional cap on targets processed in this run; the
+                campaign stays active while pending targets remain
             
         Returns:
             BulkDMResult with operation results
@@ -204,7 +224,7 @@ class BulkDMService:
         if not campaign:
             raise ValueError(f"Campaign {campaign_id} not found")
         
-        if campaign.status not in ['draft', 'paused']:
+        if campaign.status not in ['draft', 'paused', 'active']:
             raise ValueError(f"Campaign {campaign_id} is not in a sendable state (status: {campaign.status})")
         
         # Get Twitter account
@@ -217,15 +237,19 @@ class BulkDMService:
         if not is_valid:
             raise ValueError(f"Invalid message template: {', '.join(errors)}")
         
+        # Targets a dead sender left claimed become sendable again
+        self.release_stale_claims(campaign_id)
+        
         # Get targets that haven't been sent to yet
-        targets = CampaignTarget.query.filter_by(
+        pending_query = CampaignTarget.query.filter_by(
             campaign_id=campaign_id,
             status='pending'
         ).filter(
             CampaignTarget.can_dm == True
-        ).all()
+        )
+        total_targets = pending_query.count()
         
-        if not targets:
+        if not total_targets:
             logger.warning(f"No pending targets found for campaign {campaign_id}")
             return BulkDMResult(
                 campaign_id=campaign_id,
@@ -237,15 +261,17 @@ class BulkDMService:
                 status="completed"
             )
         
-        # Update campaign status
+        # Update campaign status; later runs of an active campaign keep
+        # the time it first started
         campaign.status = 'active'
-        campaign.started_at = datetime.utcnow()
+        if campaign.started_at is None:
+            campaign.started_at = datetime.utcnow()
         db.session.commit()
         
         # Initialize progress tracking
         progress = BulkDMProgress(
             campaign_id=campaign_id,
-            total_targets=len(targets),
+            total_targets=total_targets,
             processed=0,
             sent=0,
             failed=0,
@@ -256,36 +282,61 @@ class BulkDMService:
         with self._lock:
             self.progress_cache[campaign_id] = progress
         
-        # Initialize rate limiter
+        # Initialize rate limiter. A counter left over from a previous day
+        # counts as zero; _claim_daily_slot restarts it atomically on the
+        # first send, so it isn't rolled over here.
+        sent_today = 0
+        if campaign.messages_sent_day == datetime.utcnow().date():
+            sent_today = campaign.messages_sent_today or 0
         rate_limiter = RateLimiter(
             daily_limit=campaign.daily_limit,
             delay_min=campaign.delay_min,
-            delay_max=campaign.delay_max
+            delay_max=campaign.delay_max,
+            sent_today=sent_today
         )
         
         # Send DMs
         start_time = time.time()
-        result = self._send_dm_batch(
-            targets=targets,
-            campaign=campaign,
-            twitter_account=twitter_account,
-            rate_limiter=rate_limiter,
-            progress=progress
-        )
+        targets = self._iter_target_chunks(pending_query)
+        try:
+            result = self._send_dm_batch(
+                targets=islice(targets, max_targets),
+                campaign=campaign,
+                twitter_account=twitter_account,
+                rate_limiter=rate_limiter,
+                progress=progress
+            )
+        finally:
+            # Release any claimed targets the batch stopped before reaching
+            targets.close()
         
         duration = time.time() - start_time
         
+        # Add this run's sends in SQL; assigning the run total would drop
+        # sends from earlier runs and race with concurrent senders
+        if result.sent_count:
+            Campaign.query.filter_by(id=campaign_id).update(
+                {Campaign.messages_sent: Campaign.messages_sent + result.sent_count},
+                synchronize_session=False
+            )
+        
         # Update campaign status
-        if result.failed_count == 0:
+        if result.status == 'paused':
+            pass  # Leave a user pause in place so the campaign can be resumed
+        elif result.status == 'daily_limit_reached':
+            pass  # Stay active; the next run continues after the UTC day rollover
+        elif max_targets is not None and total_targets > max_targets:
+            pass  # Stay active; the remaining targets go out in later runs
+        elif result.failed_count == 0:
             campaign.status = 'completed'
             campaign.completed_at = datetime.utcnow()
-        elif result.sent_count == 0:
+        elif not self._campaign_messages_sent(campaign_id):
+            # Only a campaign that never sent anything failed; a last run
+            # whose few targets all failed doesn't undo earlier runs
             campaign.status = 'failed'
         else:
             campaign.status = 'completed'  # Partial success still counts as completed
             campaign.completed_at = datetime.utcnow()
-        
-        campaign.messages_sent = result.sent_count
         db.session.commit()
         
         # Clean up progress cache
@@ -298,14 +349,180 @@ class BulkDMService:
         
         return result
     
-    def _send_dm_batch(self, targets: List[CampaignTarget], campaign: Campaign, 
+    def _iter_target_chunks(self, query, chunk_size: int = TARGET_CHUNK_SIZE) -> Iterator[CampaignTarget]:
+        """
+        Claim and yield targets from a query in primary-key ordered chunks
+        
+        Each chunk is selected with FOR UPDATE SKIP LOCKED and flipped from
+        'pending' to 'in_progress' before it is yielded, so concurrent
+        senders for the same campaign always work on disjoint targets. Only
+        chunk_size rows are loaded at a time; a server-side cursor
+        (yield_per) can't be used here because the send loop commits after
+        every target.
+        
+        Claimed targets the caller never finished (pause, daily limit,
+        error) are put back to 'pending' when the generator is closed. The
+        claim is a lease: it's renewed while the chunk is being worked on,
+        and release_stale_claims returns targets whose lease ran out
+        because the sender died without closing the generator.
+        
+        Args:
+            query: CampaignTarget query to page through
+            chunk_size: Number of rows to claim per query
+            
+        Yields:
+            CampaignTarget rows in id order
+        """
+        last_id = 0
+        claimed_ids = []
+        try:
+            while True:
+                candidate_ids = [
+                    row.id for row in query.with_entities(CampaignTarget.id).filter(
+                        CampaignTarget.id > last_id
+                    ).order_by(CampaignTarget.id).limit(chunk_size).with_for_update(skip_locked=True).all()
+                ]
+                
+                if not candidate_ids:
+                    return
+                
+                last_id = candidate_ids[-1]
+                claimed_ids = self._claim_targets(candidate_ids)
+                db.session.commit()
+                lease_renewed_at = time.monotonic()
+                
+                if not claimed_ids:
+                    continue
+                
+                for target in CampaignTarget.query.filter(
+                    CampaignTarget.id.in_(claimed_ids)
+                ).order_by(CampaignTarget.id).all():
+                    # Renew the lease once half of it has gone, so a chunk
+                    # that takes longer than the lease isn't reclaimed
+                    if time.monotonic() - lease_renewed_at > TARGET_CLAIM_LEASE.total_seconds() / 2:
+                        self._renew_claims(claimed_ids)
+                        db.session.commit()
+                        lease_renewed_at = time.monotonic()
+                    yield target
+        finally:
+            if claimed_ids:
+                try:
+                    self._release_targets(claimed_ids)
+                    db.session.commit()
+                except Exception as e:
+                    logger.error(f"Failed to release claimed targets: {e}")
+                    db.session.rollback()
+    
+    def _claim_targets(self, target_ids: List[int]) -> List[int]:
+        """
+        Mark pending targets as in progress
+        
+        The status guard makes the claim safe even where SKIP LOCKED isn't
+        available: a target another sender claimed first is not returned.
+        
+        Args:
+            target_ids: Candidate target IDs
+            
+        Returns:
+            IDs of the targets this call claimed
+        """
+        return db.session.execute(
+            update(CampaignTarget).where(
+                CampaignTarget.id.in_(target_ids),
+                CampaignTarget.status == 'pending'
+            ).values(
+                status='in_progress', claimed_at=datetime.utcnow()
+            ).returning(CampaignTarget.id)
+        ).scalars().all()
+    
+    def _renew_claims(self, target_ids: List[int]):
+        """
+        Extend the lease on claimed targets that are still in progress
+        
+        Args:
+            target_ids: Target IDs previously returned by _claim_targets
+        """
+        CampaignTarget.query.filter(
+            CampaignTarget.id.in_(target_ids),
+            CampaignTarget.status == 'in_progress'
+        ).update({CampaignTarget.claimed_at: datetime.utcnow()}, synchronize_session=False)
+    
+    def _release_targets(self, target_ids: List[int]):
+        """
+        Return claimed targets that were not processed to pending
+        
+        Args:
+            target_ids: Target IDs previously returned by _claim_targets
+        """
+        CampaignTarget.query.filter(
+            CampaignTarget.id.in_(target_ids),
+            CampaignTarget.status == 'in_progress'
+        ).update(
+            {CampaignTarget.status: 'pending', CampaignTarget.claimed_at: None},
+            synchronize_session=False
+        )
+    
+    def _campaign_messages_sent(self, campaign_id: int) -> int:
+        """Messages sent by all runs of a campaign, read from the database"""
+        return db.session.query(Campaign.messages_sent).filter(
+            Campaign.id == campaign_id
+        ).scalar() or 0
+    
+    def has_live_claims(self, campaign_id: int) -> bool:
+        """
+        Check whether a sender is currently working on the campaign
+        
+        Args:
+            campaign_id: Campaign ID
+            
+        Returns:
+            True if any of its targets are claimed under an unexpired lease
+        """
+        lease_cutoff = datetime.utcnow() - TARGET_CLAIM_LEASE
+        return db.session.query(
+            CampaignTarget.query.filter(
+                CampaignTarget.campaign_id == campaign_id,
+                CampaignTarget.status == 'in_progress',
+                CampaignTarget.claimed_at >= lease_cutoff
+            ).exists()
+        ).scalar()
+    
+    def release_stale_claims(self, campaign_id: int) -> int:
+        """
+        Return targets whose claim lease has expired to pending
+        
+        A sender that crashes or is killed never closes its target
+        generator, so its claimed targets would otherwise stay in_progress
+        for good. Claims without a claimed_at predate the lease and are
+        treated as expired.
+        
+        Args:
+            campaign_id: Campaign whose targets to check
+            
+        Returns:
+            Number of targets returned to pending (committed by the caller)
+        """
+        lease_cutoff = datetime.utcnow() - TARGET_CLAIM_LEASE
+        released = CampaignTarget.query.filter(
+            CampaignTarget.campaign_id == campaign_id,
+            CampaignTarget.status == 'in_progress',
+            or_(CampaignTarget.claimed_at.is_(None), CampaignTarget.claimed_at < lease_cutoff)
+        ).update(
+            {CampaignTarget.status: 'pending', CampaignTarget.claimed_at: None},
+            synchronize_session=False
+        )
+        if released:
+            logger.warning(f"Released {released} stale target claims for campaign {campaign_id}")
+        return released
+    
+    def _send_dm_batch(self, targets: Iterable[CampaignTarget], campaign: Campaign, 
                       twitter_account: TwitterAccount, rate_limiter: RateLimiter,
                       progress: BulkDMProgress) -> BulkDMResult:
         """
         Send DMs to a batch of targets
         
         Args:
-            targets: List of targets to send to
+            targets: Targets to send to (any iterable, consumed lazily)
             campaign: Campaign object
             twitter_account: Twitter account to send from
             rate_limiter: Rate limiter instance
@@ -323,99 +540,130 @@ class BulkDMService:
         failed_count = 0
         errors = []
         
+        # Read per-batch constants once; the per-target commit expires the
+        # campaign instance, so touching its attributes in the loop would
+        # reload the whole row for every target.
+        campaign_id = campaign.id
+        message_template = campaign.message_template
+        daily_limit = campaign.daily_limit
+        daily_limit_reached = False
+        paused = False
+        
         for i, target in enumerate(targets):
-            # Check if campaign was paused
-            current_campaign = Campaign.query.get(campaign.id)
-            if current_campaign.status == 'paused':
-                logger.info(f"Campaign {campaign.id} was paused, stopping DM sending")
+            # Claim one of today's sends in the database so the daily limit
+            # holds across every worker sending for this campaign, then
+            # commit straight away so the campaign row isn't kept locked
+            if not self._claim_daily_slot(campaign_id, daily_limit):
+                logger.info(f"Daily limit of {daily_limit} reached for campaign {campaign_id}, stopping DM sending")
+                daily_limit_reached = True
+                break
+            db.session.commit()
+            
+            # Wait for rate limiting. End the read transaction opened by the
+            # target fetch first so no transaction or pooled connection is
+            # held for the length of the delay.
+            if not rate_limiter.can_send():
+                db.session.commit()
+                while not rate_limiter.can_send():
+                    wait_time = rate_limiter.wait_time()
+                    if wait_time > 0:
+                        logger.info(f"Rate limit reached, waiting {wait_time} seconds")
+                        time.sleep(min(wait_time, 60))  # Sleep in chunks of max 60 seconds
+            
+            # Check if campaign was paused (after waiting, so a pause issued
+            # during the delay is honoured before the next send)
+            current_status = db.session.query(Campaign.status).filter_by(id=campaign_id).scalar()
+            if current_status == 'paused':
+                logger.info(f"Campaign {campaign_id} was paused, stopping DM sending")
+                self._release_daily_slot(campaign_id)
+                db.session.commit()
+                paused = True
                 break
             
             # Update progress
             progress.processed = i + 1
             progress.current_target = target.username
             
-            # Wait for rate limiting
-            while not rate_limiter.can_send():
-                wait_time = rate_limiter.wait_time()
-                if wait_time > 0:
-                    logger.info(f"Rate limit reached, waiting {wait_time} seconds")
-                    time.sleep(min(wait_time, 60))  # Sleep in chunks of max 60 seconds
+            # Defer all flushing to the per-target commit below so the
+            # writes for this target go out together, not piecemeal
+            # ahead of whatever query happens to run next
+            with db.session.no_autoflush:
+                dm_sent = False
+                try:
+                    # Personalize message
+                    personalized_message = MessagePersonalizer.personalize_message(
+                        message_template, target
+                    )
+                    
+                    # Send DM
+                    result = dm_client.send_dm(
+                        user_id=target.twitter_user_id,
+                        text=personalized_message
+                    )
+                    dm_sent = True
+                    
+                    # Record successful send
+                    rate_limiter.record_send()
+                    sent_count += 1
+                    progress.sent += 1
+                    
+                    # Create campaign message record and mark the target sent
+                    self._record_sent_message(
+                        campaign_id=campaign_id,
+                        target_id=target.id,
+                        message_content=personalized_message,
+                        twitter_message_id=result.message_id
+                    )
+                    
+                    logger.info(f"Successfully sent DM to {target.username} (message_id: {result.message_id})")
+                    
+                except TwitterAPIError as e:
+                    # Handle DM sending error
+                    failed_count += 1
+                    progress.failed += 1
+                    
+                    error_info = {
+                        'target_id': target.id,
+                        'username': target.username,
+                        'error': str(e),
+                        'timestamp': datetime.utcnow().isoformat()
+                    }
+                    errors.append(error_info)
+                    
+                    # Update target status
+                    target.status = 'failed'
+                    target.error_message = str(e)
+                    
+                    # Hand the unused slot back
+                    self._release_daily_slot(campaign_id)
+                    
+                    logger.error(f"Failed to send DM to {target.username}: {e}")
+                    
+                    # Check if it's a retryable error
+                    if self._is_retryable_error(e):
+                        logger.info(f"Error for {target.username} may be retryable")
+                        # Could implement retry logic here
             
-            try:
-                # Personalize message
-                personalized_message = MessagePersonalizer.personalize_message(
-                    campaign.message_template, target
-                )
-                
-                # Send DM
-                result = dm_client.send_dm(
-                    user_id=target.twitter_user_id,
-                    text=personalized_message
-                )
-                
-                # Record successful send
-                rate_limiter.record_send()
-                sent_count += 1
-                progress.sent += 1
-                
-                # Update target status
-                target.status = 'sent'
-                target.message_sent_at = datetime.utcnow()
-                
-                # Create campaign message record
-                campaign_message = CampaignMessage(
-                    campaign_id=campaign.id,
-                    target_id=target.id,
-                    message_content=personalized_message,
-                    twitter_message_id=result.message_id,
-                    status='sent',
-                    sent_at=datetime.utcnow()
-                )
-                db.session.add(campaign_message)
-                
-                logger.info(f"Successfully sent DM to {target.username} (message_id: {result.message_id})")
-                
-            except TwitterAPIError as e:
-                # Handle DM sending error
-                failed_count += 1
-                progress.failed += 1
-                
-                error_info = {
-                    'target_id': target.id,
-                    'username': target.username,
-                    'error': str(e),
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-                errors.append(error_info)
-                
-                # Update target status
-                target.status = 'failed'
-                target.error_message = str(e)
-                
-                logger.error(f"Failed to send DM to {target.username}: {e}")
-                
-                # Check if it's a retryable error
-                if self._is_retryable_error(e):
-                    logger.info(f"Error for {target.username} may be retryable")
-                    # Could implement retry logic here
-            
-            except Exception as e:
-                # Handle unexpected errors
-                failed_count += 1
-                progress.failed += 1
-                
-                error_info = {
-                    'target_id': target.id,
-                    'username': target.username,
-                    'error': f"Unexpected error: {str(e)}",
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-                errors.append(error_info)
-                
-                target.status = 'failed'
-                target.error_message = f"Unexpected error: {str(e)}"
-                
-                logger.error(f"Unexpected error sending DM to {target.username}: {e}")
+                except Exception as e:
+                    # Handle unexpected errors
+                    failed_count += 1
+                    progress.failed += 1
+                    
+                    error_info = {
+                        'target_id': target.id,
+                        'username': target.username,
+                        'error': f"Unexpected error: {str(e)}",
+                        'timestamp': datetime.utcnow().isoformat()
+                    }
+                    errors.append(error_info)
+                    
+                    target.status = 'failed'
+                    target.error_message = f"Unexpected error: {str(e)}"
+                    
+                    if not dm_sent:
+                        self._release_daily_slot(campaign_id)
+                    
+                    logger.error(f"Unexpected error sending DM to {target.username}: {e}")
             
             # Commit changes for this target
             try:
@@ -427,13 +675,132 @@ class BulkDMService:
         progress.status = "completed"
         
         return BulkDMResult(
-            campaign_id=campaign.id,
-            total_targets=len(targets),
+            campaign_id=campaign_id,
+            total_targets=progress.total_targets,
             sent_count=sent_count,
             failed_count=failed_count,
             errors=errors,
             duration_seconds=0.0,  # Will be set by caller
-            status="completed" if failed_count == 0 else "partial"
+            status=self._batch_status(paused, daily_limit_reached, failed_count)
+        )
+    
+    def _batch_status(self, paused: bool, daily_limit_reached: bool, failed_count: int) -> str:
+        """Summarize how a send batch ended"""
+        if paused:
+            return "paused"
+        if daily_limit_reached:
+            return "daily_limit_reached"
+        return "completed" if failed_count == 0 else "partial"
+    
+    def _record_sent_message(self, campaign_id: int, target_id: int,
+                             message_content: str, twitter_message_id: Optional[str]):
+        """
+        Insert the campaign message row and mark its target as sent
+        
+        On PostgreSQL both writes go out as one writable-CTE statement; other
+        dialects issue an INSERT followed by a bulk UPDATE. Neither path
+        touches ORM objects, so nothing is queued for autoflush. The changes
+        are committed by the caller.
+        
+        Args:
+            campaign_id: Campaign the message belongs to
+            target_id: Target that received the message
+            message_content: Personalized message text that was sent
+            twitter_message_id: Message ID returned by the DM API
+        """
+        now = datetime.utcnow()
+        
+        if db.session.get_bind().dialect.name == 'postgresql':
+            db.session.execute(
+                text(
+                    "WITH ins AS ("
+                    "INSERT INTO campaign_messages "
+                    "(campaign_id, target_id, message_content, twitter_message_id, status, created_at, sent_at) "
+                    "VALUES (:campaign_id, :target_id, :message_content, :twitter_message_id, 'sent', :now, :now) "
+                    "RETURNING id) "
+                    "UPDATE campaign_targets SET status = 'sent', message_sent_at = :now "
+                    "WHERE id = :target_id"
+                ),
+                {
+                    'campaign_id': campaign_id,
+                    'target_id': target_id,
+                    'message_content': message_content,
+                    'twitter_message_id': twitter_message_id,
+                    'now': now
+                }
+            )
+            return
+        
+        db.session.execute(
+            insert(CampaignMessage).values(
+                campaign_id=campaign_id,
+                target_id=target_id,
+                message_content=message_content,
+                twitter_message_id=twitter_message_id,
+                status='sent',
+                created_at=now,
+                sent_at=now
+            )
+        )
+        db.session.query(CampaignTarget).filter_by(id=target_id).update(
+            {CampaignTarget.status: 'sent', CampaignTarget.message_sent_at: now},
+            synchronize_session=False
+        )
+    
+    def _claim_daily_slot(self, campaign_id: int, daily_limit: int) -> bool:
+        """
+        Atomically reserve one of the campaign's sends for today
+        
+        The check and the increment are a single conditional UPDATE, so
+        concurrent senders for the same campaign, in this process or any
+        other, can never together exceed daily_limit. A counter left over
+        from a previous day is restarted at 1.
+        
+        Args:
+            campaign_id: Campaign about to send a DM
+            daily_limit: Maximum DMs the campaign may send per day
+            
+        Returns:
+            True if a slot was reserved, False if today's limit is used up
+        """
+        today = datetime.utcnow().date()
+        claimed = Campaign.query.filter(
+            Campaign.id == campaign_id,
+            Campaign.messages_sent_day == today,
+            Campaign.messages_sent_today < daily_limit
+        ).update(
+            {Campaign.messages_sent_today: Campaign.messages_sent_today + 1},
+            synchronize_session=False
+        )
+        if claimed:
+            return True
+        
+        if daily_limit < 1:
+            return False
+        
+        claimed = Campaign.query.filter(
+            Campaign.id == campaign_id,
+            or_(Campaign.messages_sent_day.is_(None), Campaign.messages_sent_day != today)
+        ).update(
+            {Campaign.messages_sent_today: 1, Campaign.messages_sent_day: today},
+            synchronize_session=False
+        )
+        return bool(claimed)
+    
+    def _release_daily_slot(self, campaign_id: int):
+        """
+        Return a slot reserved by _claim_daily_slot that wasn't used
+        
+        Args:
+            campaign_id: Campaign whose DM was not sent
+        """
+        Campaign.query.filter(
+            Campaign.id == campaign_id,
+            Campaign.messages_sent_day == datetime.utcnow().date(),
+            Campaign.messages_sent_today > 0
+        ).update(
+            {Campaign.messages_sent_today: Campaign.messages_sent_today - 1},
+            synchronize_session=False
         )
     
     def _is_retryable_error(self, error: TwitterAPIError) -> bool:
@@ -10,7 +10,7 @@ import csv
 import io
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, and_
 
 
 class CampaignAnalyticsService:
@@ -38,9 +38,6 @@ class CampaignAnalyticsService:
             if not campaign:
                 raise ValueError(f"Campaign {campaign_id} not found")
             
-            # Calculate target metrics
-            total_targets = CampaignTarget.query.filter_by(campaign_id=campaign_id).count()
-            
             # Calculate message status counts
             message_stats = db.session.query(
                 CampaignMessage.status,
@@ -57,6 +54,10 @@ class CampaignAnalyticsService:
             
             target_status_counts = {status: count for status, count in target_stats}
             
+            # Every target falls into exactly one status group, so the total
+            # comes from the breakdown instead of a separate COUNT query
+            total_targets = sum(target_status_counts.values())
+            
             # Calculate reply sentiment counts
             sentiment_stats = db.session.query(
                 CampaignTarget.reply_sentiment,
@@ -141,52 +142,36 @@ class CampaignAnalyticsService:
                 (100001, float('inf'), 'mega')
             ]
             
-            follower_distribution = {}
+            follower_counts = []
             for min_count, max_count, label in follower_ranges:
-                if max_count == float('inf'):
-                    count = CampaignTarget.query.filter(
-                        CampaignTarget.campaign_id == campaign_id,
-                        CampaignTarget.follower_count >= min_count
-                    ).count()
-                else:
-                    count = CampaignTarget.query.filter(
-                        CampaignTarget.campaign_id == campaign_id,
-                        CampaignTarget.follower_count >= min_count,
-                        CampaignTarget.follower_count <= max_count
-                    ).count()
-                follower_distribution[label] = count
-            
-            # Get verification status distribution
-            verified_count = CampaignTarget.query.filter(
-                CampaignTarget.campaign_id == campaign_id,
-                CampaignTarget.is_verified == True
-            ).count()
-            
-            unverified_count = CampaignTarget.query.filter(
-                CampaignTarget.campaign_id == campaign_id,
-                CampaignTarget.is_verified == False
-            ).count()
-            
-            # Calculate average metrics
-            avg_stats = db.session.query(
+                condition = CampaignTarget.follower_count >= min_count
+                if max_count != float('inf'):
+                    condition = and_(condition, CampaignTarget.follower_count <= max_count)
+                follower_counts.append(func.count().filter(condition).label(label))
+            
+            # Compute every distribution bucket and the average metrics in a
+            # single pass over the campaign's targets
+            stats = db.session.query(
+                func.count().label('total_targets'),
+                *follower_counts,
+                func.count().filter(CampaignTarget.is_verified == True).label('verified'),
+                func.count().filter(CampaignTarget.is_verified == False).label('unverified'),
+                func.count().filter(CampaignTarget.can_dm == True).label('can_dm'),
+                func.count().filter(CampaignTarget.can_dm == False).label('cannot_dm'),
                 func.avg(CampaignTarget.follower_count).label('avg_followers'),
                 func.avg(CampaignTarget.following_count).label('avg_following'),
                 func.min(CampaignTarget.follower_count).label('min_followers'),
                 func.max(CampaignTarget.follower_count).label('max_followers')
-            ).filter(CampaignTarget.campaign_id == campaign_id).first()
+            ).filter(CampaignTarget.campaign_id == campaign_id).one()
             
-            # Get DM capability distribution
-            can_dm_count = CampaignTarget.query.filter(
-                CampaignTarget.campaign_id == campaign_id,
-                CampaignTarget.can_dm == True
-            ).count()
-            
-            cannot_dm_count = CampaignTarget.query.filter(
-                CampaignTarget.campaign_id == campaign_id,
-                CampaignTarget.can_dm == False
-            ).count()
-            
-            total_targets = CampaignTarget.query.filter_by(campaign_id=campaign_id).count()
+            follower_distribution = {
+                label: getattr(stats, label) for _, _, label in follower_ranges
+            }
+            verified_count = stats.verified
+            unverified_count = stats.unverified
+            can_dm_count = stats.can_dm
+            cannot_dm_count = stats.cannot_dm
+            total_targets = stats.total_targets
             
             return {
                 'campaign_id': campaign_id,
@@ -203,10 +188,10 @@ class CampaignAnalyticsService:
                     'dm_rate': round((can_dm_count / total_targets * 100), 2) if total_targets > 0 else 0
                 },
                 'follower_stats': {
-                    'average_followers': round(avg_stats.avg_followers, 2) if avg_stats.avg_followers else 0,
-                    'average_following': round(avg_stats.avg_following, 2) if avg_stats.avg_following else 0,
-                    'min_followers': avg_stats.min_followers or 0,
-                    'max_followers': avg_stats.max_followers or 0
+                    'average_followers': round(stats.avg_followers, 2) if stats.avg_followers else 0,
+                    'average_following': round(stats.avg_following, 2) if stats.avg_following else 0,
+                    'min_followers': stats.min_followers or 0,
+                    'max_followers': stats.max_followers or 0
                 }
             }
             
@@ -5,13 +5,208 @@ Provides encryption/decryption and expiration management
 
 import os
 import base64
+import calendar
+import functools
+import hashlib
+import json
 import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Hashable, List, Sequence, Tuple
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+# Fixed salt for consistency across processes and restarts
+KDF_SALT = b'twitterapi_salt'
+KDF_ITERATIONS = 100000
+HKDF_INFO = b'fernet-cookie'
+SUBKEY_INFO_PREFIX = b'fernet-cookie-subkey:'
+AEAD_INFO = b'aesgcm-cookie'
+
+# Key derivation for COOKIE_ENCRYPTION_KEY: 'pbkdf2' (default, what existing
+# cookies were encrypted with), 'hkdf' for high-entropy keys, where PBKDF2's
+# stretching adds startup cost but no security, or 'raw' to use a key from
+# generate_encryption_key() as-is
+KDF_PBKDF2 = 'pbkdf2'
+KDF_HKDF = 'hkdf'
+KDF_RAW = 'raw'
+
+# Every Fernet token starts with the 0x80 version byte followed by the high
+# (zero) bytes of its timestamp, which always encode to this prefix. Tokens
+# written before the extra base64 layer was dropped don't, so they can be told
+# apart without a failed decrypt.
+FERNET_TOKEN_PREFIX = 'gAAAAA'
+
+# Plaintext envelope of Fernet tokens: version byte, big-endian expiry in epoch
+# seconds (0 when the cookie never expires), then the raw cookie bytes. The
+# encryption time is not stored because Fernet carries it in the token header.
+PAYLOAD_VERSION = b'\x01'
+_EXPIRY = struct.Struct('>q')
+_TIMESTAMP = struct.Struct('>Q')
+
+# New tokens are 'v2.' + base64 of: header (expiry and encryption time in
+# epoch seconds, authenticated as associated data), 12-byte nonce, then the
+# AES-256-GCM ciphertext of the raw cookie. Fernet tokens are still read.
+TOKEN_V2_PREFIX = 'v2.'
+_V2_HEADER = struct.Struct('>qQ')
+NONCE_SIZE = 12
+
+# Token expiries are reused for this many seconds, for at most this many
+# tokens, so validity checks skip decryption. Only the expiry is kept; the
+# plaintext cookie (and its auth_token) is never cached.
+EXPIRY_CACHE_TTL = 60
+EXPIRY_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=8)
+def _derive_key(key: str, salt: bytes, iterations: int) -> bytes:
+    """
+    Derive a 32-byte master key from a string key with PBKDF2
+    
+    PBKDF2 is deliberately slow, and the key and salt don't change while the
+    process runs, so the result is cached: only the first CookieEncryption
+    for a given key pays for the derivation.
+    
+    Args:
+        key: String key for encryption
+        salt: PBKDF2 salt
+        iterations: PBKDF2 iteration count
+        
+    Returns:
+        Derived key bytes
+    """
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=iterations,
+    )
+    
+    return kdf.derive(key.encode())
+
+
+def _hkdf(key_material: bytes, salt: bytes, info: bytes) -> bytes:
+    """
+    Derive a 32-byte key with HKDF-SHA256
+    
+    Args:
+        key_material: High-entropy input key
+        salt: HKDF salt
+        info: HKDF context string
+        
+    Returns:
+        Derived key bytes
+    """
+    hkdf = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        info=info,
+    )
+    
+    return hkdf.derive(key_material)
+
+
+@functools.lru_cache(maxsize=32)
+def _aead_for(master_key: bytes) -> AESGCM:
+    """
+    Get the AES-GCM cipher for a master key
+    
+    The AES key is expanded from the master key with HKDF so it is never the
+    same key material the Fernet cipher suite uses.
+    
+    Args:
+        master_key: Raw master key bytes
+        
+    Returns:
+        AES-256-GCM cipher
+    """
+    return AESGCM(_hkdf(master_key, KDF_SALT, AEAD_INFO))
+
+
+@functools.lru_cache(maxsize=32)
+def _fernet_for(derived_key: bytes) -> Fernet:
+    """
+    Get the Fernet cipher suite for a raw 32-byte key
+    
+    Cached so every CookieEncryption for a key shares one cipher suite,
+    which the decryption cache keys on.
+    
+    Args:
+        derived_key: Raw key bytes
+        
+    Returns:
+        Fernet cipher suite
+    """
+    return Fernet(base64.urlsafe_b64encode(derived_key))
+
+
+class _ExpiryCache:
+    """
+    Bounded, short-lived cache of decrypted token expiries shared by all managers
+    
+    Entries are keyed by the cipher suite and a digest of the token, so the
+    ciphertext itself is not retained and an expiry only counts for the key
+    that decrypted the token. The digest is keyed with a per-process secret
+    so cache keys can't be predicted from a token, and lookups go through
+    dict hashing rather than a byte-by-byte comparison of token material.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._digest_key = os.urandom(16)
+    
+    def make_key(self, cipher_suite: Fernet, encrypted_cookie: str) -> Hashable:
+        digest = hashlib.blake2b(encrypted_cookie.encode(), digest_size=16, key=self._digest_key)
+        return cipher_suite, digest.digest()
+    
+    def get(self, key: Hashable) -> Optional[int]:
+        """
+        Look up a cached token expiry
+        
+        Returns:
+            Expiry in epoch seconds (0 for no expiry), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, cached_until = entry
+            if time.monotonic() > cached_until:
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return expires_at
+    
+    def put(self, key: Hashable, expires_at: int):
+        with self._lock:
+            self._entries[key] = (expires_at, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def discard(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_expiry_cache = _ExpiryCache(EXPIRY_CACHE_SIZE, EXPIRY_CACHE_TTL)
+
 
 class CookieEncryption:
     """
@@ -34,7 +229,43 @@ class CookieEncryption:
             raise ValueError("COOKIE_ENCRYPTION_KEY environment variable is required")
         
         # Generate Fernet key from the provided key
+        self._master_key = self._derive_master_key(key)
         self.cipher_suite = self._create_cipher_suite(key)
+        self._aead = _aead_for(self._master_key)
+    
+    def _derive_master_key(self, key: str) -> bytes:
+        """
+        Derive the 32-byte master key from string key
+        
+        Args:
+            key: String key for encryption
+            
+        Returns:
+            Master key bytes
+            
+        Raises:
+            ValueError: If COOKIE_KEY_KDF names an unknown derivation, or is
+                'raw' and the key is not 32 bytes of URL-safe base64
+        """
+        kdf = os.getenv('COOKIE_KEY_KDF', KDF_PBKDF2).lower()
+        
+        if kdf == KDF_RAW:
+            try:
+                master_key = base64.urlsafe_b64decode(key.encode())
+            except (ValueError, TypeError):
+                master_key = b''
+            if len(master_key) != 32 or base64.urlsafe_b64encode(master_key).decode() != key:
+                raise ValueError("COOKIE_ENCRYPTION_KEY must be 32 url-safe base64-encoded bytes when COOKIE_KEY_KDF is raw")
+            return master_key
+        
+        if kdf == KDF_HKDF:
+            return _hkdf(key.encode(), KDF_SALT, HKDF_INFO)
+        
+        if kdf != KDF_PBKDF2:
+            raise ValueError(f"Unsupported COOKIE_KEY_KDF: {kdf}")
+        
+        # Use PBKDF2 to derive a proper key from the string
+        return _derive_key(key, KDF_SALT, KDF_ITERATIONS)
     
     def _create_cipher_suite(self, key: str) -> Fernet:
         """
@@ -46,17 +277,26 @@ class CookieEncryption:
         Returns:
             Fernet cipher suite
         """
-        # Use PBKDF2 to derive a proper key from the string
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=b'twitterapi_salt',  # Fixed salt for consistency
-            iterations=100000,
-        )
+        return _fernet_for(self._master_key)
+    
+    def derive_subkey(self, info: bytes) -> Fernet:
+        """
+        Derive a Fernet cipher suite for a separate cookie category
+        
+        Subkeys come from the already-derived master key with one HKDF call,
+        so categories such as refresh or CSRF cookies get their own key
+        without another PBKDF2 run.
         
-        # Derive key and create Fernet instance
-        derived_key = base64.urlsafe_b64encode(kdf.derive(key.encode()))
-        return Fernet(derived_key)
+        Args:
+            info: Category label, e.g. b'refresh'; must differ per category
+            
+        Returns:
+            Fernet cipher suite for the category
+        """
+        if not info:
+            raise ValueError("Subkey info must be a non-empty label")
+        
+        return _fernet_for(_hkdf(self._master_key, KDF_SALT, SUBKEY_INFO_PREFIX + info))
     
     def encrypt_cookie(self, cookie: str, expires_at: Optional[datetime] = None) -> Dict[str, Any]:
         """
@@ -69,6 +309,32 @@ class CookieEncryption:
         Returns:
             Dictionary with encrypted cookie and metadata
             
+        Raises:
+            ValueError: If cookie is empty or invalid
+            Exception: If encryption fails
+        """
+        expires_epoch = calendar.timegm(expires_at.utctimetuple()) if expires_at else 0
+        encrypted_cookie = self._encrypt_with_expiry(cookie, expires_epoch)
+        
+        return {
+            'encrypted_cookie': encrypted_cookie,
+            'encrypted_at': datetime.utcnow(),
+            'expires_at': expires_at
+        }
+    
+    def _encrypt_with_expiry(self, cookie: str, expires_at: int) -> str:
+        """
+        Encrypt login cookie with an expiry given in epoch seconds
+        
+        This is the path store_cookie uses, skipping datetime construction.
+        
+        Args:
+            cookie: Login cookie string to encrypt
+            expires_at: Expiration time in epoch seconds, 0 for no expiry
+            
+        Returns:
+            Encrypted cookie string for database storage
+            
         Raises:
             ValueError: If cookie is empty or invalid
             Exception: If encryption fails
@@ -77,25 +343,13 @@ class CookieEncryption:
             raise ValueError("Cookie must be a non-empty string")
         
         try:
-            # Create cookie data with metadata
-            cookie_data = {
-                'cookie': cookie,
-                'encrypted_at': datetime.utcnow().isoformat(),
-                'expires_at': expires_at.isoformat() if expires_at else None
-            }
-            
-            # Convert to JSON string and encrypt
-            import json
-            cookie_json = json.dumps(cookie_data)
-            encrypted_cookie = self.cipher_suite.encrypt(cookie_json.encode())
+            header = _V2_HEADER.pack(expires_at, int(time.time()))
+            nonce = os.urandom(NONCE_SIZE)
+            sealed = header + nonce + self._aead.encrypt(nonce, cookie.encode('utf-8'), header)
             
-            self.logger.info("Cookie encrypted successfully")
+            self.logger.debug("Cookie encrypted successfully")
             
-            return {
-                'encrypted_cookie': base64.urlsafe_b64encode(encrypted_cookie).decode(),
-                'encrypted_at': datetime.utcnow(),
-                'expires_at': expires_at
-            }
+            return TOKEN_V2_PREFIX + base64.urlsafe_b64encode(sealed).decode('ascii')
             
         except Exception as e:
             self.logger.error(f"Cookie encryption failed: {str(e)}")
@@ -106,10 +360,43 @@ class CookieEncryption:
         Decrypt stored login cookie
         
         Args:
-            encrypted_cookie: Base64 encoded encrypted cookie
+            encrypted_cookie: Encrypted cookie token (v2, Fernet or legacy double-encoded)
             
         Returns:
-            Dictionary with decrypted cookie and metadata
+            Dictionary with decrypted cookie and metadata; expires_at_epoch
+            is the expiry in epoch seconds, 0 if the cookie never expires
+            
+        Raises:
+            ValueError: If encrypted_cookie is invalid
+            Exception: If decryption fails
+        """
+        try:
+            cookie, encrypted_epoch, expires_epoch = self._decrypt_payload(encrypted_cookie)
+        except Exception as e:
+            self.logger.error(f"Cookie decryption failed: {str(e)}")
+            raise
+        
+        return {
+            'cookie': cookie,
+            'encrypted_at': datetime.utcfromtimestamp(encrypted_epoch),
+            'expires_at': datetime.utcfromtimestamp(expires_epoch) if expires_epoch else None,
+            'expires_at_epoch': expires_epoch,
+            'is_expired': self._is_expired(expires_epoch)
+        }
+    
+    def _decrypt_payload(self, encrypted_cookie: str) -> Tuple[str, int, int]:
+        """
+        Decrypt stored login cookie without building datetimes
+        
+        Failures are raised without logging so batch callers can report
+        them once.
+        
+        Args:
+            encrypted_cookie: Encrypted cookie token (v2, Fernet or legacy double-encoded)
+            
+        Returns:
+            Tuple of (cookie, encrypted_at, expires_at) with times in epoch
+            seconds and 0 for no expiry
             
         Raises:
             ValueError: If encrypted_cookie is invalid
@@ -119,39 +406,76 @@ class CookieEncryption:
             raise ValueError("Encrypted cookie must be a non-empty string")
         
         try:
-            # Decode from base64 and decrypt
-            encrypted_data = base64.urlsafe_b64decode(encrypted_cookie.encode())
-            decrypted_data = self.cipher_suite.decrypt(encrypted_data)
+            if encrypted_cookie.startswith(TOKEN_V2_PREFIX):
+                sealed = base64.urlsafe_b64decode(encrypted_cookie[len(TOKEN_V2_PREFIX):])
+                header = sealed[:_V2_HEADER.size]
+                nonce = sealed[_V2_HEADER.size:_V2_HEADER.size + NONCE_SIZE]
+                plaintext = self._aead.decrypt(nonce, sealed[_V2_HEADER.size + NONCE_SIZE:], header)
+                expires_epoch, encrypted_epoch = _V2_HEADER.unpack(header)
+                return plaintext.decode('utf-8'), encrypted_epoch, expires_epoch
             
-            # Parse JSON data
-            import json
-            cookie_data = json.loads(decrypted_data.decode())
-            
-            # Parse datetime strings back to datetime objects
-            encrypted_at = datetime.fromisoformat(cookie_data['encrypted_at'])
-            expires_at = None
-            if cookie_data.get('expires_at'):
-                expires_at = datetime.fromisoformat(cookie_data['expires_at'])
+            # Fernet tokens are already URL-safe base64; only legacy tokens
+            # carry a second base64 layer that has to be stripped first
+            encrypted_data = encrypted_cookie.encode()
+            if not encrypted_cookie.startswith(FERNET_TOKEN_PREFIX):
+                encrypted_data = base64.urlsafe_b64decode(encrypted_data)
+            decrypted_data = self.cipher_suite.decrypt(encrypted_data)
             
-            self.logger.info("Cookie decrypted successfully")
+            if decrypted_data[:1] == PAYLOAD_VERSION:
+                expires_epoch = _EXPIRY.unpack_from(decrypted_data, 1)[0]
+                cookie = decrypted_data[1 + _EXPIRY.size:].decode('utf-8')
+                return cookie, self._token_timestamp(encrypted_data), expires_epoch
             
-            return {
-                'cookie': cookie_data['cookie'],
-                'encrypted_at': encrypted_at,
-                'expires_at': expires_at,
-                'is_expired': self._is_expired(expires_at)
-            }
+            return self._parse_legacy_payload(decrypted_data)
             
         except Exception as e:
-            self.logger.error(f"Cookie decryption failed: {str(e)}")
             raise Exception(f"Failed to decrypt cookie: {str(e)}")
     
-    def _is_expired(self, expires_at: Optional[datetime]) -> bool:
+    @staticmethod
+    def _token_timestamp(token: bytes) -> int:
+        """
+        Read the encryption time from a Fernet token header
+        
+        The token has already been verified by decrypt, so only the first
+        12 base64 characters (version byte plus timestamp) are decoded.
+        
+        Args:
+            token: Fernet token bytes
+            
+        Returns:
+            Encryption time in epoch seconds
+        """
+        header = base64.urlsafe_b64decode(token[:12])
+        return _TIMESTAMP.unpack_from(header, 1)[0]
+    
+    @staticmethod
+    def _parse_legacy_payload(decrypted_data: bytes):
+        """
+        Parse the JSON payload written by earlier versions of encrypt_cookie
+        
+        Args:
+            decrypted_data: Decrypted JSON bytes
+            
+        Returns:
+            Tuple of (cookie, encrypted_at, expires_at) with times in epoch
+            seconds and 0 for no expiry
+        """
+        cookie_data = json.loads(decrypted_data.decode())
+        
+        encrypted_at = datetime.fromisoformat(cookie_data['encrypted_at'])
+        expires_at = 0
+        if cookie_data.get('expires_at'):
+            expires_at = datetime.fromisoformat(cookie_data['expires_at'])
+            expires_at = calendar.timegm(expires_at.utctimetuple())
+        
+        return cookie_data['cookie'], calendar.timegm(encrypted_at.utctimetuple()), expires_at
+    
+    def _is_expired(self, expires_at: int) -> bool:
         """
         Check if cookie has expired
         
         Args:
-            expires_at: Expiration datetime
+            expires_at: Expiration time in epoch seconds, 0 for no expiry
             
         Returns:
             True if expired, False otherwise
@@ -159,7 +483,7 @@ class CookieEncryption:
         if not expires_at:
             return False
         
-        return datetime.utcnow() > expires_at
+        return time.time() > expires_at
     
     def validate_cookie_expiration(self, encrypted_cookie: str) -> Dict[str, Any]:
         """
@@ -228,10 +552,42 @@ class CookieEncryption:
         Generate a new encryption key for configuration
         
         Returns:
-            Base64 encoded encryption key
+            32 random bytes, URL-safe base64 encoded
         """
-        key = Fernet.generate_key()
-        return base64.urlsafe_b64encode(key).decode()
+        return Fernet.generate_key().decode()
+
+
+_default_encryption: Optional[CookieEncryption] = None
+_default_encryption_settings: Optional[Tuple[Optional[str], Optional[str]]] = None
+_default_encryption_lock = threading.Lock()
+
+
+def get_default_encryption() -> CookieEncryption:
+    """
+    Get the process-wide CookieEncryption for COOKIE_ENCRYPTION_KEY
+    
+    CookieManager is constructed per request, so the instance is shared
+    rather than rebuilt each time. It is recreated if the key or KDF
+    settings in the environment change.
+    
+    Returns:
+        Shared CookieEncryption instance
+        
+    Raises:
+        ValueError: If COOKIE_ENCRYPTION_KEY is not set
+    """
+    global _default_encryption, _default_encryption_settings
+    
+    settings = (os.getenv('COOKIE_ENCRYPTION_KEY'), os.getenv('COOKIE_KEY_KDF'))
+    encryption = _default_encryption
+    if encryption is not None and _default_encryption_settings == settings:
+        return encryption
+    
+    with _default_encryption_lock:
+        if _default_encryption is None or _default_encryption_settings != settings:
+            _default_encryption = CookieEncryption()
+            _default_encryption_settings = settings
+        return _default_encryption
 
 
 class CookieManager:
@@ -246,7 +602,10 @@ class CookieManager:
         Args:
             encryption_key: Optional encryption key
         """
-        self.encryption = CookieEncryption(encryption_key)
+        if encryption_key is None:
+            self.encryption = get_default_encryption()
+        else:
+            self.encryption = CookieEncryption(encryption_key)
         self.logger = logging.getLogger(__name__)
     
     def store_cookie(self, cookie: str, expiration_hours: int = 24) -> str:
@@ -260,9 +619,30 @@ class CookieManager:
         Returns:
             Encrypted cookie string for database storage
         """
-        expires_at = self.encryption.create_expiration_datetime(expiration_hours)
-        encrypted_data = self.encryption.encrypt_cookie(cookie, expires_at)
-        return encrypted_data['encrypted_cookie']
+        expires_at = int(time.time()) + int(expiration_hours * 3600)
+        return self.encryption._encrypt_with_expiry(cookie, expires_at)
+    
+    def _decrypt(self, encrypted_cookie: str) -> Tuple[str, bool]:
+        """
+        Decrypt cookie and remember its expiry for later validity checks
+        
+        Only unexpired tokens have their expiry cached.
+        
+        Args:
+            encrypted_cookie: Encrypted cookie from database
+            
+        Returns:
+            Tuple of (cookie, is_expired)
+            
+        Raises:
+            Exception: If decryption fails
+        """
+        cookie, _, expires_at = self.encryption._decrypt_payload(encrypted_cookie)
+        is_expired = self.encryption._is_expired(expires_at)
+        if not is_expired:
+            _expiry_cache.put(_expiry_cache.make_key(self.encryption.cipher_suite, encrypted_cookie), expires_at)
+        
+        return cookie, is_expired
     
     def retrieve_cookie(self, encrypted_cookie: str) -> Optional[str]:
         """
@@ -275,27 +655,96 @@ class CookieManager:
             Raw cookie if valid and not expired, None otherwise
         """
         try:
-            cookie_data = self.encryption.decrypt_cookie(encrypted_cookie)
+            cookie, is_expired = self._decrypt(encrypted_cookie)
             
-            if cookie_data['is_expired']:
+            if is_expired:
                 self.logger.warning("Cookie has expired")
                 return None
             
-            return cookie_data['cookie']
+            return cookie
             
         except Exception as e:
             self.logger.error(f"Cookie retrieval failed: {str(e)}")
             return None
     
+    def retrieve_if_valid(self, encrypted_cookie: str) -> Optional[str]:
+        """
+        Decrypt cookie once and return it only if it is valid and not expired
+        
+        Use this instead of is_cookie_valid followed by retrieve_cookie, which
+        decrypts the same token twice.
+        
+        Args:
+            encrypted_cookie: Encrypted cookie from database
+            
+        Returns:
+            Raw cookie if valid and not expired, None otherwise
+        """
+        try:
+            cookie, is_expired = self._decrypt(encrypted_cookie)
+        except Exception as e:
+            self.logger.error(f"Cookie decryption failed: {str(e)}")
+            return None
+        
+        if is_expired:
+            return None
+        
+        return cookie
+    
+    def retrieve_many(self, encrypted_cookies: Sequence[str]) -> List[Optional[str]]:
+        """
+        Retrieve a batch of cookies, e.g. for account sweeps
+        
+        Tokens that fail to decrypt are counted and reported in one
+        warning instead of one error each.
+        
+        Args:
+            encrypted_cookies: Encrypted cookies from database
+            
+        Returns:
+            Raw cookies in input order, None for each invalid or expired one
+        """
+        results: List[Optional[str]] = [None] * len(encrypted_cookies)
+        failed = 0
+        
+        for i, encrypted_cookie in enumerate(encrypted_cookies):
+            try:
+                cookie, is_expired = self._decrypt(encrypted_cookie)
+            except Exception:
+                failed += 1
+                continue
+            
+            if not is_expired:
+                results[i] = cookie
+        
+        if failed:
+            self.logger.warning(f"Failed to decrypt {failed} of {len(encrypted_cookies)} cookies")
+        
+        return results
+    
     def is_cookie_valid(self, encrypted_cookie: str) -> bool:
         """
         Check if cookie is valid and not expired
         
+        Tokens decrypted within EXPIRY_CACHE_TTL are checked against their
+        cached expiry without decrypting again. Callers that need the cookie
+        afterwards should use retrieve_if_valid rather than checking first.
+        
         Args:
             encrypted_cookie: Encrypted cookie to check
             
         Returns:
             True if valid and not expired
         """
-        validation = self.encryption.validate_cookie_expiration(encrypted_cookie)
-        return validation.get('valid', False) and not validation.get('is_expired', True)
\ No newline at end of file
+        if not encrypted_cookie or not isinstance(encrypted_cookie, str):
+            return False
+        
+        key = _expiry_cache.make_key(self.encryption.cipher_suite, encrypted_cookie)
+        expires_at = _expiry_cache.get(key)
+        if expires_at is not None:
+            if not self.encryption._is_expired(expires_at):
+                return True
+            _expiry_cache.discard(key)
+            return False
+        
+        return self.retrieve_if_valid(encrypted_cookie) is not None
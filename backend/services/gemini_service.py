@@ -1,36 +1,513 @@
 import google.generativeai as genai
+import hashlib
 import json
 import logging
-from typing import Dict, List, Optional, Tuple
+import os
+import orjson
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from flask import current_app
+from google.api_core import exceptions as google_exceptions
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of targets/messages sent in one batch request; larger
+# lists are split so each response stays well inside the output limit
+BATCH_CHUNK_SIZE = 25
+
+# Default number of Gemini requests in flight per call to the concurrent
+# helpers, and the size of the thread pool they all share
+MAX_CONCURRENT_REQUESTS = 5
+GEMINI_MAX_WORKERS = int(os.environ.get('GEMINI_MAX_WORKERS', 8))
+
+# Static parts of the DM prompts, built once at import
+_DM_PROMPT_BASE = """You are an expert at writing personalized, engaging direct messages for Twitter/X. 
+Your goal is to create authentic, human-like messages that feel personal and relevant to the recipient.
+
+IMPORTANT RULES:
+- Keep messages under 280 characters (Twitter DM limit)
+- Make it feel natural and conversational, not salesy
+- Use the recipient's profile information to personalize
+- Follow the specific campaign rules provided
+- Avoid spam-like language
+- Don't use excessive emojis or exclamation marks
+- Make it feel like a genuine person reaching out
+
+"""
+
+_DM_PROMPT_CLOSING = """
+Now generate a personalized direct message for this person. Return only the message text, nothing else.
+The message should feel authentic and be something a real person would send.
+"""
+
+_BATCH_DM_PROMPT_BASE = """You are an expert at writing personalized, engaging direct messages for Twitter/X. 
+Your goal is to create authentic, human-like messages that feel personal and relevant to each recipient.
+
+IMPORTANT RULES:
+- Keep each message under 280 characters (Twitter DM limit)
+- Make it feel natural and conversational, not salesy
+- Use each recipient's own profile information to personalize their message
+- Follow the specific campaign rules provided
+- Avoid spam-like language
+- Don't use excessive emojis or exclamation marks
+- Messages to different recipients must not read like copies of each other
+
+"""
+
+# Prompt templates for the other calls, filled with str.format; the
+# doubled braces are literal JSON braces
+_SENTIMENT_PROMPT = """
+Analyze the sentiment of this Twitter/X direct message reply. Classify it as one of:
+- positive: Interested, engaged, asking questions, wants to know more
+- negative: Dismissive, angry, uninterested, asking to stop
+- neutral: Acknowledges but no clear interest either way
+
+Also provide a brief explanation of why you classified it this way.
+
+Message to analyze: "{reply_text}"
+
+Respond in JSON format:
+{{
+    "sentiment": "positive/negative/neutral",
+    "confidence": 0.0-1.0,
+    "explanation": "brief explanation",
+    "key_indicators": ["list", "of", "key", "words", "or", "phrases"]
+}}
+"""
+
+_SENTIMENT_BATCH_PROMPT = """
+Analyze the sentiment of each of these Twitter/X direct message replies. Classify each as one of:
+- positive: Interested, engaged, asking questions, wants to know more
+- negative: Dismissive, angry, uninterested, asking to stop
+- neutral: Acknowledges but no clear interest either way
+
+Also provide a brief explanation of why you classified each one this way.
+
+REPLIES TO ANALYZE (JSON array of objects with an index and the message text):
+{replies_json}
+
+Respond with only a JSON array of {count} objects, one per reply:
+[
+    {{
+        "index": index of the reply,
+        "sentiment": "positive/negative/neutral",
+        "confidence": 0.0-1.0,
+        "explanation": "brief explanation",
+        "key_indicators": ["list", "of", "key", "words", "or", "phrases"]
+    }}
+]
+"""
+
+_FOLLOW_UP_PROMPT = """
+You are having a conversation via Twitter/X direct messages. Generate an appropriate follow-up message based on the conversation history.
+
+ORIGINAL MESSAGE YOU SENT:
+"{original_dm}"
+
+THEIR REPLY:
+"{reply}"
+
+TARGET PROFILE:
+- Username: @{username}
+- Bio: {bio}
+
+CAMPAIGN RULES:
+{rules_json}
+
+Generate a natural, conversational follow-up message that:
+1. Acknowledges their reply appropriately
+2. Continues the conversation naturally
+3. Stays under 280 characters
+4. Feels authentic and human
+5. Moves toward the campaign goal if appropriate
+
+Return only the follow-up message text, nothing else.
+"""
+
+_OPTIMIZE_PROMPT = """
+Analyze this DM campaign performance data and suggest optimizations to the campaign rules.
+
+CURRENT CAMPAIGN PERFORMANCE:
+- Messages Sent: {messages_sent}
+- Reply Rate: {reply_rate}%
+- Positive Replies: {positive_replies}
+- Negative Replies: {negative_replies}
+- Average Response Time: {avg_response_time}
+
+CURRENT CAMPAIGN RULES:
+{rules_json}
+
+SAMPLE MESSAGES THAT PERFORMED WELL:
+{top_messages_json}
+
+SAMPLE MESSAGES THAT PERFORMED POORLY:
+{poor_messages_json}
+
+Based on this data, suggest specific improvements to the campaign rules. Focus on:
+1. Tone and messaging adjustments
+2. Personalization strategies
+3. Call-to-action optimization
+4. Timing recommendations
+5. Target audience refinements
+
+Respond in JSON format with optimized rules and explanations:
+{{
+    "optimized_rules": {{
+        "tone": "suggested tone",
+        "purpose": "refined purpose",
+        "call_to_action": "optimized CTA",
+        "personalization_focus": "what to focus on",
+        "additional_instructions": "specific guidance"
+    }},
+    "changes_made": [
+        {{"rule": "rule_name", "change": "description of change", "reason": "why this change"}}
+    ],
+    "expected_improvements": "what improvements to expect"
+}}
+"""
+
+_WARMUP_TWEET_PROMPT = """
+Generate a natural, engaging tweet that a real person would post. It should:
+- Be under 280 characters
+- Sound authentic and human
+- Be about general topics like technology, business, lifestyle, or current events
+- Not be promotional or spam-like
+- Include appropriate hashtags (1-2 max)
+
+Return only the tweet text, nothing else.
+"""
+
+_WARMUP_REPLY_PROMPT = """
+Generate a natural, engaging reply to a tweet. The reply should:
+- Be under 280 characters
+- Add value to the conversation
+- Sound like a real person's response
+- Not be spam-like or promotional
+- Be relevant to the original tweet context
+
+Target tweet context: {tweet_text}
+
+Return only the reply text, nothing else.
+"""
+
+_VALIDATE_PROMPT = """
+Evaluate this direct message for quality and compliance with the campaign rules.
+
+MESSAGE TO EVALUATE:
+"{message}"
+
+CAMPAIGN RULES:
+{rules_json}
+
+Rate the message on a scale of 0.0 to 1.0 based on:
+1. Adherence to campaign rules (0.3 weight)
+2. Natural/human-like tone (0.25 weight)  
+3. Personalization quality (0.2 weight)
+4. Engagement potential (0.15 weight)
+5. Spam/bot detection risk (0.1 weight - lower is better)
+
+Respond in JSON format:
+{{
+    "overall_score": 0.0-1.0,
+    "breakdown": {{
+        "rule_adherence": 0.0-1.0,
+        "natural_tone": 0.0-1.0,
+        "personalization": 0.0-1.0,
+        "engagement": 0.0-1.0,
+        "spam_risk": 0.0-1.0
+    }},
+    "issues": ["list of specific issues found"],
+    "suggestions": ["list of specific improvements"],
+    "approved": true/false
+}}
+"""
+
+_VALIDATE_BATCH_PROMPT = """
+Evaluate each of these direct messages for quality and compliance with the campaign rules.
+
+MESSAGES TO EVALUATE (JSON array):
+{messages_json}
+
+CAMPAIGN RULES:
+{rules_json}
+
+Rate each message on a scale of 0.0 to 1.0 based on:
+1. Adherence to campaign rules (0.3 weight)
+2. Natural/human-like tone (0.25 weight)  
+3. Personalization quality (0.2 weight)
+4. Engagement potential (0.15 weight)
+5. Spam/bot detection risk (0.1 weight - lower is better)
+
+Respond with only a JSON array of {count} objects, where element i evaluates message i:
+[
+    {{
+        "overall_score": 0.0-1.0,
+        "breakdown": {{
+            "rule_adherence": 0.0-1.0,
+            "natural_tone": 0.0-1.0,
+            "personalization": 0.0-1.0,
+            "engagement": 0.0-1.0,
+            "spam_risk": 0.0-1.0
+        }},
+        "issues": ["list of specific issues found"],
+        "suggestions": ["list of specific improvements"],
+        "approved": true/false
+    }}
+]
+"""
+
+# Campaign rule keys in prompt order as (key, label, is_list)
+_RULE_FIELDS = (
+    ('tone', 'Tone', False),
+    ('purpose', 'Purpose', False),
+    ('call_to_action', 'Call to Action', False),
+    ('avoid_words', 'Words to Avoid', True),
+    ('include_keywords', 'Keywords to Include', True),
+    ('personalization_focus', 'Personalization Focus', False),
+    ('additional_instructions', 'Additional Instructions', False),
+)
+
+# Transient Gemini errors (rate limits, overload, timeouts) are retried
+# with exponential backoff and jitter, capped at GEMINI_RETRY_MAX_DELAY
+GEMINI_MAX_RETRIES = 4
+GEMINI_RETRY_BASE_DELAY = 1.0
+GEMINI_RETRY_MAX_DELAY = 30.0
+RETRYABLE_GEMINI_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    TimeoutError,
+)
+
+# Output token caps per call type. Single messages are under 280
+# characters, so capping them bounds the latency of interactive calls and
+# stops runaway generations; None leaves the model's default limit for the
+# batch prompts, whose output grows with the number of inputs
+MAX_OUTPUT_TOKENS = {
+    'dm': 256,
+    'follow_up': 256,
+    'warmup': 256,
+    'sentiment': 512,
+    'validation': 1024,
+    'optimization': 2048,
+    'batch': None,
+}
+
+# Markdown code fences Gemini sometimes wraps JSON answers in, and the
+# widest object/array span used when there is other text around the JSON
+_JSON_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$', re.IGNORECASE)
+_JSON_SPAN_RE = re.compile(r'\{.*\}|\[.*\]', re.DOTALL)
+
+
+def _extract_json(text: str):
+    """
+    Parse a JSON answer from a Gemini response
+    
+    Tries the stripped text, then the text without ```json fences, then
+    the widest {...} or [...] span in it.
+    
+    Raises:
+        orjson.JSONDecodeError: If no JSON can be parsed
+    """
+    text = text.strip()
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    
+    text = _JSON_FENCE_RE.sub('', text)
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        match = _JSON_SPAN_RE.search(text)
+        if not match:
+            raise
+        return orjson.loads(match.group(0))
+
+
+# Keywords for the sentiment fallback when Gemini's answer can't be parsed,
+# matched as substrings of the lowercased reply
+_POSITIVE_REPLY_RE = re.compile('|'.join(map(re.escape, (
+    'yes', 'interested', 'tell me more', 'sounds good', 'love', 'great'
+))))
+_NEGATIVE_REPLY_RE = re.compile('|'.join(map(re.escape, (
+    'no', 'stop', 'spam', 'not interested', 'leave me alone'
+))))
+
+# Generated DMs and validation results are reused for identical inputs
+DM_CACHE_SIZE = 2048
+DM_CACHE_TTL = 3600
+VALIDATION_CACHE_SIZE = 2048
+
+
+class _ResponseCache:
+    """
+    Bounded, expiring cache of Gemini results shared by all service instances
+    
+    Entries are keyed by a digest of the canonical JSON of the prompt
+    inputs, so re-running a campaign over the same targets or re-validating
+    the same message doesn't pay for the same request twice.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def make_key(self, *inputs) -> str:
+        canonical = json.dumps(inputs, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+    
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            value, cached_until = entry
+            if time.monotonic() > cached_until:
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_dm_cache = _ResponseCache(DM_CACHE_SIZE, DM_CACHE_TTL)
+_validation_cache = _ResponseCache(VALIDATION_CACHE_SIZE, DM_CACHE_TTL)
+
+
+@dataclass
+class TargetProfile:
+    """Profile fields of a DM target that are sent to Gemini"""
+    __slots__ = ('username', 'name', 'bio', 'followers_count', 'following_count', 'verified')
+    
+    username: str
+    name: str
+    bio: str
+    followers_count: int
+    following_count: int
+    verified: bool
+    
+    @classmethod
+    def from_target(cls, target) -> 'TargetProfile':
+        """Build a profile straight from a CampaignTarget row"""
+        return cls(
+            username=target.username or 'user',
+            name=target.display_name or 'N/A',
+            bio=target.bio or 'No bio available',
+            followers_count=target.follower_count or 0,
+            following_count=target.following_count or 0,
+            verified=bool(target.is_verified)
+        )
+    
+    @classmethod
+    def from_dict(cls, profile: Dict) -> 'TargetProfile':
+        """Build a profile from the dict shape generate_personalized_dm takes"""
+        return cls(
+            username=profile.get('username', 'user'),
+            name=profile.get('name', 'N/A'),
+            bio=profile.get('bio', 'No bio available'),
+            followers_count=profile.get('followers_count', 0),
+            following_count=profile.get('following_count', 0),
+            verified=profile.get('verified', False)
+        )
+
+_model: Optional[genai.GenerativeModel] = None
+_model_api_key: Optional[str] = None
+_model_lock = threading.Lock()
+
+
+def _get_model(api_key: str) -> genai.GenerativeModel:
+    """
+    Get the process-wide GenerativeModel for an API key
+    
+    GeminiService is constructed per use, so the SDK is configured and the
+    model built once rather than on every construction. They are rebuilt
+    if the configured API key changes.
+    """
+    global _model, _model_api_key
+    
+    model = _model
+    if model is not None and _model_api_key == api_key:
+        return model
+    
+    with _model_lock:
+        if _model is None or _model_api_key != api_key:
+            genai.configure(api_key=api_key)
+            _model = genai.GenerativeModel('gemini-pro')
+            _model_api_key = api_key
+        return _model
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the process-wide pool for concurrent Gemini requests"""
+    global _executor
+    
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=GEMINI_MAX_WORKERS,
+                                               thread_name_prefix='gemini')
+    return _executor
+
+
 class GeminiService:
     """Service for interacting with Google Gemini AI"""
     
     def __init__(self):
         self.api_key = current_app.config['GEMINI_API_KEY']
         if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-pro')
+            self.model = _get_model(self.api_key)
         else:
             logger.warning("Gemini API key not configured")
             self.model = None
     
     def generate_personalized_dm(self, target_profile: Dict, campaign_rules: Dict, 
-                                template: str = None) -> Tuple[bool, str]:
+                                template: str = None, use_cache: bool = True) -> Tuple[bool, str]:
         """
         Generate a personalized DM based on target profile and campaign rules
+        
+        Identical inputs within DM_CACHE_TTL return the previously generated
+        message; pass use_cache=False to force a new one.
         """
         if not self.model:
             return False, "Gemini AI not configured"
         
         try:
+            cache_key = _dm_cache.make_key(target_profile, campaign_rules, template)
+            if use_cache:
+                cached = _dm_cache.get(cache_key)
+                if cached is not None:
+                    return True, cached
+            
             # Construct the prompt for personalized DM generation
             prompt = self._build_dm_prompt(target_profile, campaign_rules, template)
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_content(prompt, 'dm')
             
             if response.text:
                 # Clean up the response
@@ -40,6 +517,7 @@ class GeminiService:
                 if generated_dm.startswith('"') and generated_dm.endswith('"'):
                     generated_dm = generated_dm[1:-1]
                 
+                _dm_cache.put(cache_key, generated_dm)
                 return True, generated_dm
             else:
                 return False, "No response generated"
@@ -48,27 +526,61 @@ class GeminiService:
             logger.error(f"Error generating DM with Gemini: {str(e)}")
             return False, f"Error: {str(e)}"
     
+    def generate_personalized_dm_stream(self, target_profile: Dict, campaign_rules: Dict,
+                                        template: str = None) -> Tuple[bool, Union[Iterator[str], str]]:
+        """
+        Generate a personalized DM, yielding the text as Gemini streams it
+        
+        The first text arrives after the first generated tokens rather than
+        the whole message, so callers can start showing or checking it early.
+        Opening the stream is retried like any other request; an error while
+        reading later chunks is raised from the iterator. Closing the
+        iterator stops reading the stream.
+        
+        Args:
+            target_profile: Profile of the DM target
+            campaign_rules: Campaign rules to follow
+            template: Optional message template/structure to follow
+            
+        Returns:
+            Tuple of (success, iterator of message text chunks) or
+            (False, error message) if the stream could not be opened
+        """
+        if not self.model:
+            return False, "Gemini AI not configured"
+        
+        try:
+            prompt = self._build_dm_prompt(target_profile, campaign_rules, template)
+            
+            # The library reads the first chunk before returning, so errors
+            # up to the first tokens go through the retry loop here
+            response = self._generate_content(prompt, 'dm', stream=True)
+            
+        except Exception as e:
+            logger.error(f"Error streaming DM from Gemini: {str(e)}")
+            return False, f"Error: {str(e)}"
+        
+        return True, self._iter_stream_text(response)
+    
+    def _iter_stream_text(self, response) -> Iterator[str]:
+        """Yield the text of each streamed chunk, logging a failed read before raising it"""
+        try:
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            logger.error(f"Error reading DM stream from Gemini: {str(e)}")
+            raise
+    
     def _build_dm_prompt(self, target_profile: Dict, campaign_rules: Dict, template: str = None) -> str:
         """Build a comprehensive prompt for DM generation"""
         
         # Base context
-        prompt = """You are an expert at writing personalized, engaging direct messages for Twitter/X. 
-Your goal is to create authentic, human-like messages that feel personal and relevant to the recipient.
-
-IMPORTANT RULES:
-- Keep messages under 280 characters (Twitter DM limit)
-- Make it feel natural and conversational, not salesy
-- Use the recipient's profile information to personalize
-- Follow the specific campaign rules provided
-- Avoid spam-like language
-- Don't use excessive emojis or exclamation marks
-- Make it feel like a genuine person reaching out
-
-"""
+        parts = [_DM_PROMPT_BASE]
         
         # Add target profile information
         if target_profile:
-            prompt += f"""
+            parts.append(f"""
 TARGET PROFILE INFORMATION:
 - Username: @{target_profile.get('username', 'user')}
 - Display Name: {target_profile.get('name', 'N/A')}
@@ -77,48 +589,156 @@ TARGET PROFILE INFORMATION:
 - Following: {target_profile.get('following_count', 0)}
 - Verified: {target_profile.get('verified', False)}
 
-"""
+""")
         
         # Add campaign rules
-        if campaign_rules:
-            prompt += "CAMPAIGN RULES TO FOLLOW:\n"
+        parts.append(self._build_rules_section(campaign_rules))
+        
+        # Add template if provided
+        if template:
+            parts.append(f"""
+MESSAGE TEMPLATE/STRUCTURE TO FOLLOW:
+{template}
+
+Adapt this template to be personalized for the target profile above.
+""")
+        
+        parts.append(_DM_PROMPT_CLOSING)
+        
+        return ''.join(parts)
+    
+    def _build_rules_section(self, campaign_rules: Dict) -> str:
+        """Format campaign rules as a prompt section"""
+        if not campaign_rules:
+            return ""
+        
+        parts = ["CAMPAIGN RULES TO FOLLOW:\n"]
+        
+        for key, label, is_list in _RULE_FIELDS:
+            if key in campaign_rules:
+                value = ', '.join(campaign_rules[key]) if is_list else campaign_rules[key]
+                parts.append(f"- {label}: {value}\n")
+        
+        return ''.join(parts)
+    
+    def generate_personalized_dms(self, profiles: List[Union[TargetProfile, Dict]], campaign_rules: Dict,
+                                  template: str = None) -> Tuple[bool, List[str]]:
+        """
+        Generate personalized DMs for several targets with a single Gemini request
+        
+        Args:
+            profiles: TargetProfile objects, or dicts in the shape generate_personalized_dm takes
+            campaign_rules: Campaign rules applied to every message
+            template: Optional message template/structure to follow
+            
+        Returns:
+            Tuple of (success, messages) where messages[i] belongs to profiles[i],
+            or (False, [error]) on failure
+        """
+        if not self.model:
+            return False, ["Gemini AI not configured"]
+        
+        # Large campaigns are sent in chunks of BATCH_CHUNK_SIZE targets
+        messages = []
+        for start in range(0, len(profiles), BATCH_CHUNK_SIZE):
+            success, chunk_messages = self._generate_dm_chunk(
+                profiles[start:start + BATCH_CHUNK_SIZE], campaign_rules, template
+            )
+            if not success:
+                return False, chunk_messages
+            messages.extend(chunk_messages)
+        
+        return True, messages
+    
+    def generate_personalized_dms_concurrently(self, profiles: List[Union[TargetProfile, Dict]],
+                                               campaign_rules: Dict, template: str = None,
+                                               max_workers: int = MAX_CONCURRENT_REQUESTS) -> List[Tuple[bool, str]]:
+        """
+        Generate personalized DMs with one Gemini request per target, run concurrently
+        
+        Unlike generate_personalized_dms, every target gets the full
+        single-target prompt and a failure only affects that target.
+        
+        Args:
+            profiles: TargetProfile objects, or dicts in the shape generate_personalized_dm takes
+            campaign_rules: Campaign rules applied to every message
+            template: Optional message template/structure to follow
+            max_workers: Maximum concurrent Gemini requests
             
-            if 'tone' in campaign_rules:
-                prompt += f"- Tone: {campaign_rules['tone']}\n"
+        Returns:
+            List of generate_personalized_dm results, where element i belongs to profiles[i]
+            
+        Raises:
+            ValueError: If max_workers is less than 1
+        """
+        profile_dicts = [asdict(profile) if isinstance(profile, TargetProfile) else profile
+                         for profile in profiles]
+        return self._map_concurrently(
+            lambda profile: self.generate_personalized_dm(profile, campaign_rules, template),
+            profile_dicts, max_workers
+        )
+    
+    def _generate_dm_chunk(self, profiles: List[Union[TargetProfile, Dict]], campaign_rules: Dict,
+                           template: str = None) -> Tuple[bool, List[str]]:
+        """Generate DMs for one chunk of profiles with a single Gemini request"""
+        try:
+            prompt = self._build_batch_dm_prompt(profiles, campaign_rules, template)
             
-            if 'purpose' in campaign_rules:
-                prompt += f"- Purpose: {campaign_rules['purpose']}\n"
+            response = self._generate_content(prompt, 'batch')
             
-            if 'call_to_action' in campaign_rules:
-                prompt += f"- Call to Action: {campaign_rules['call_to_action']}\n"
+            if not response.text:
+                return False, ["No response generated"]
             
-            if 'avoid_words' in campaign_rules:
-                prompt += f"- Words to Avoid: {', '.join(campaign_rules['avoid_words'])}\n"
+            try:
+                generated = _extract_json(response.text)
+            except orjson.JSONDecodeError:
+                return False, ["Could not parse generated messages"]
             
-            if 'include_keywords' in campaign_rules:
-                prompt += f"- Keywords to Include: {', '.join(campaign_rules['include_keywords'])}\n"
+            if not isinstance(generated, list) or len(generated) != len(profiles):
+                return False, [f"Expected {len(profiles)} messages in response"]
             
-            if 'personalization_focus' in campaign_rules:
-                prompt += f"- Personalization Focus: {campaign_rules['personalization_focus']}\n"
+            messages = []
+            for message in generated:
+                message = str(message).strip()
+                if message.startswith('"') and message.endswith('"'):
+                    message = message[1:-1]
+                messages.append(message)
             
-            if 'additional_instructions' in campaign_rules:
-                prompt += f"- Additional Instructions: {campaign_rules['additional_instructions']}\n"
+            return True, messages
+                
+        except Exception as e:
+            logger.error(f"Error generating DM batch with Gemini: {str(e)}")
+            return False, [f"Error: {str(e)}"]
+    
+    def _build_batch_dm_prompt(self, profiles: List[Union[TargetProfile, Dict]], campaign_rules: Dict,
+                               template: str = None) -> str:
+        """Build a prompt asking for one DM per profile as a JSON array"""
+        
+        targets = []
+        for i, profile in enumerate(profiles):
+            if not isinstance(profile, TargetProfile):
+                profile = TargetProfile.from_dict(profile)
+            targets.append({'index': i, **asdict(profile)})
+        
+        parts = [_BATCH_DM_PROMPT_BASE, self._build_rules_section(campaign_rules)]
         
-        # Add template if provided
         if template:
-            prompt += f"""
+            parts.append(f"""
 MESSAGE TEMPLATE/STRUCTURE TO FOLLOW:
 {template}
 
-Adapt this template to be personalized for the target profile above.
-"""
+Adapt this template to be personalized for each target profile.
+""")
         
-        prompt += """
-Now generate a personalized direct message for this person. Return only the message text, nothing else.
-The message should feel authentic and be something a real person would send.
-"""
+        parts.append(f"""
+TARGET PROFILES (JSON array):
+{json.dumps(targets, indent=2)}
+
+Generate one personalized direct message per target profile.
+Respond with only a JSON array of {len(targets)} strings, where element i is the message for the profile with index i.
+""")
         
-        return prompt
+        return ''.join(parts)
     
     def analyze_reply_sentiment(self, reply_text: str) -> Tuple[bool, Dict]:
         """
@@ -128,38 +748,22 @@ The message should feel authentic and be something a real person would send.
             return False, {"error": "Gemini AI not configured"}
         
         try:
-            prompt = f"""
-Analyze the sentiment of this Twitter/X direct message reply. Classify it as one of:
-- positive: Interested, engaged, asking questions, wants to know more
-- negative: Dismissive, angry, uninterested, asking to stop
-- neutral: Acknowledges but no clear interest either way
-
-Also provide a brief explanation of why you classified it this way.
-
-Message to analyze: "{reply_text}"
-
-Respond in JSON format:
-{{
-    "sentiment": "positive/negative/neutral",
-    "confidence": 0.0-1.0,
-    "explanation": "brief explanation",
-    "key_indicators": ["list", "of", "key", "words", "or", "phrases"]
-}}
-"""
+            prompt = _SENTIMENT_PROMPT.format(reply_text=reply_text)
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_content(prompt, 'sentiment')
             
             if response.text:
                 try:
                     # Try to parse JSON response
-                    result = json.loads(response.text.strip())
+                    result = _extract_json(response.text)
                     return True, result
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     # Fallback to simple sentiment extraction
                     sentiment = "neutral"
-                    if any(word in reply_text.lower() for word in ['yes', 'interested', 'tell me more', 'sounds good', 'love', 'great']):
+                    lowered = reply_text.lower()
+                    if _POSITIVE_REPLY_RE.search(lowered):
                         sentiment = "positive"
-                    elif any(word in reply_text.lower() for word in ['no', 'stop', 'spam', 'not interested', 'leave me alone']):
+                    elif _NEGATIVE_REPLY_RE.search(lowered):
                         sentiment = "negative"
                     
                     return True, {
@@ -175,6 +779,145 @@ Respond in JSON format:
             logger.error(f"Error analyzing sentiment with Gemini: {str(e)}")
             return False, {"error": str(e)}
     
+    def analyze_reply_sentiments(self, replies: List[str],
+                                 max_workers: int = MAX_CONCURRENT_REQUESTS) -> List[Tuple[bool, Dict]]:
+        """
+        Analyze the sentiment of several replies concurrently
+        
+        Args:
+            replies: Reply texts to analyze
+            max_workers: Maximum concurrent Gemini requests
+            
+        Returns:
+            List of analyze_reply_sentiment results, where element i belongs to replies[i]
+            
+        Raises:
+            ValueError: If max_workers is less than 1
+        """
+        return self._map_concurrently(self.analyze_reply_sentiment, replies, max_workers)
+    
+    def analyze_reply_sentiment_batch(self, replies: List[str]) -> List[Tuple[bool, Dict]]:
+        """
+        Analyze the sentiment of several replies with one Gemini request per chunk
+        
+        Replies are sent in chunks of BATCH_CHUNK_SIZE. If a chunk's response
+        can't be parsed or is missing replies, that chunk falls back to
+        analyze_reply_sentiment for each of its replies.
+        
+        Args:
+            replies: Reply texts to analyze
+            
+        Returns:
+            List of results in the shape analyze_reply_sentiment returns, where
+            element i belongs to replies[i]
+        """
+        if not self.model:
+            return [(False, {"error": "Gemini AI not configured"}) for _ in replies]
+        
+        results = []
+        for start in range(0, len(replies), BATCH_CHUNK_SIZE):
+            chunk = replies[start:start + BATCH_CHUNK_SIZE]
+            chunk_results = self._analyze_sentiment_chunk(chunk)
+            if chunk_results is None:
+                chunk_results = [self.analyze_reply_sentiment(reply) for reply in chunk]
+            results.extend(chunk_results)
+        
+        return results
+    
+    def _analyze_sentiment_chunk(self, replies: List[str]) -> Optional[List[Tuple[bool, Dict]]]:
+        """Analyze one chunk of replies in a single request, or None if the response is unusable"""
+        try:
+            prompt = _SENTIMENT_BATCH_PROMPT.format(
+                replies_json=json.dumps([{'index': i, 'message': reply} for i, reply in enumerate(replies)], indent=2),
+                count=len(replies)
+            )
+            
+            response = self._generate_content(prompt, 'batch')
+            
+            if not response.text:
+                return None
+            
+            by_index = {}
+            for result in _extract_json(response.text):
+                if isinstance(result, dict) and isinstance(result.get('index'), int):
+                    by_index[result.pop('index')] = result
+            
+            if any(i not in by_index for i in range(len(replies))):
+                return None
+            
+            return [(True, by_index[i]) for i in range(len(replies))]
+                
+        except Exception as e:
+            logger.error(f"Error analyzing sentiment batch with Gemini: {str(e)}")
+            return None
+    
+    def _generate_content(self, prompt: str, kind: str, stream: bool = False):
+        """
+        Send a prompt to Gemini with the output token cap for its call type
+        
+        Transient errors are retried up to GEMINI_MAX_RETRIES times with
+        exponential backoff; other errors, and the last transient one, are
+        raised to the caller. With stream=True the streaming response is
+        returned once its first chunk has arrived.
+        """
+        max_output_tokens = MAX_OUTPUT_TOKENS[kind]
+        kwargs = {}
+        if max_output_tokens is not None:
+            kwargs['generation_config'] = {'max_output_tokens': max_output_tokens}
+        if stream:
+            kwargs['stream'] = True
+        
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            try:
+                return self.model.generate_content(prompt, **kwargs)
+            except RETRYABLE_GEMINI_ERRORS as e:
+                if attempt == GEMINI_MAX_RETRIES:
+                    raise
+                
+                delay = min(GEMINI_RETRY_BASE_DELAY * (2 ** attempt), GEMINI_RETRY_MAX_DELAY)
+                delay += random.uniform(0, delay)
+                logger.warning(f"Gemini {kind} request failed (attempt {attempt + 1}), "
+                               f"retrying in {delay:.1f}s: {str(e)}")
+                time.sleep(delay)
+    
+    def _map_concurrently(self, func, items: List, max_workers: int) -> List:
+        """
+        Apply func to every item on the shared pool, keeping input order
+        
+        Raises:
+            ValueError: If max_workers is less than 1
+        """
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+        
+        if not items:
+            return []
+        
+        # The Gemini calls are network-bound, so threads overlap the waiting;
+        # the per-item methods catch their own errors. The semaphore is taken
+        # before each submit so one call never has more than max_workers
+        # requests queued or running on the shared pool
+        in_flight = threading.BoundedSemaphore(max_workers)
+        
+        def run(item):
+            try:
+                return func(item)
+            finally:
+                in_flight.release()
+        
+        executor = _get_executor()
+        futures = []
+        for item in items:
+            in_flight.acquire()
+            try:
+                futures.append(executor.submit(run, item))
+            except BaseException:
+                # run never starts, so it can't hand the permit back
+                in_flight.release()
+                raise
+        
+        return [future.result() for future in futures]
+    
     def generate_follow_up_message(self, original_dm: str, reply: str, 
                                   campaign_rules: Dict, target_profile: Dict) -> Tuple[bool, str]:
         """
@@ -184,33 +927,15 @@ Respond in JSON format:
             return False, "Gemini AI not configured"
         
         try:
-            prompt = f"""
-You are having a conversation via Twitter/X direct messages. Generate an appropriate follow-up message based on the conversation history.
-
-ORIGINAL MESSAGE YOU SENT:
-"{original_dm}"
-
-THEIR REPLY:
-"{reply}"
-
-TARGET PROFILE:
-- Username: @{target_profile.get('username', 'user')}
-- Bio: {target_profile.get('bio', 'No bio')}
-
-CAMPAIGN RULES:
-{json.dumps(campaign_rules, indent=2)}
-
-Generate a natural, conversational follow-up message that:
-1. Acknowledges their reply appropriately
-2. Continues the conversation naturally
-3. Stays under 280 characters
-4. Feels authentic and human
-5. Moves toward the campaign goal if appropriate
-
-Return only the follow-up message text, nothing else.
-"""
+            prompt = _FOLLOW_UP_PROMPT.format(
+                original_dm=original_dm,
+                reply=reply,
+                username=target_profile.get('username', 'user'),
+                bio=target_profile.get('bio', 'No bio'),
+                rules_json=json.dumps(campaign_rules, indent=2)
+            )
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_content(prompt, 'follow_up')
             
             if response.text:
                 follow_up = response.text.strip()
@@ -233,55 +958,24 @@ Return only the follow-up message text, nothing else.
             return False, {"error": "Gemini AI not configured"}
         
         try:
-            prompt = f"""
-Analyze this DM campaign performance data and suggest optimizations to the campaign rules.
-
-CURRENT CAMPAIGN PERFORMANCE:
-- Messages Sent: {campaign_performance.get('messages_sent', 0)}
-- Reply Rate: {campaign_performance.get('reply_rate', 0)}%
-- Positive Replies: {campaign_performance.get('positive_replies', 0)}
-- Negative Replies: {campaign_performance.get('negative_replies', 0)}
-- Average Response Time: {campaign_performance.get('avg_response_time', 'N/A')}
-
-CURRENT CAMPAIGN RULES:
-{json.dumps(current_rules, indent=2)}
-
-SAMPLE MESSAGES THAT PERFORMED WELL:
-{json.dumps(campaign_performance.get('top_performing_messages', []), indent=2)}
-
-SAMPLE MESSAGES THAT PERFORMED POORLY:
-{json.dumps(campaign_performance.get('poor_performing_messages', []), indent=2)}
-
-Based on this data, suggest specific improvements to the campaign rules. Focus on:
-1. Tone and messaging adjustments
-2. Personalization strategies
-3. Call-to-action optimization
-4. Timing recommendations
-5. Target audience refinements
-
-Respond in JSON format with optimized rules and explanations:
-{{
-    "optimized_rules": {{
-        "tone": "suggested tone",
-        "purpose": "refined purpose",
-        "call_to_action": "optimized CTA",
-        "personalization_focus": "what to focus on",
-        "additional_instructions": "specific guidance"
-    }},
-    "changes_made": [
-        {{"rule": "rule_name", "change": "description of change", "reason": "why this change"}}
-    ],
-    "expected_improvements": "what improvements to expect"
-}}
-"""
+            prompt = _OPTIMIZE_PROMPT.format(
+                messages_sent=campaign_performance.get('messages_sent', 0),
+                reply_rate=campaign_performance.get('reply_rate', 0),
+                positive_replies=campaign_performance.get('positive_replies', 0),
+                negative_replies=campaign_performance.get('negative_replies', 0),
+                avg_response_time=campaign_performance.get('avg_response_time', 'N/A'),
+                rules_json=json.dumps(current_rules, indent=2),
+                top_messages_json=json.dumps(campaign_performance.get('top_performing_messages', []), indent=2),
+                poor_messages_json=json.dumps(campaign_performance.get('poor_performing_messages', []), indent=2)
+            )
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_content(prompt, 'optimization')
             
             if response.text:
                 try:
-                    result = json.loads(response.text.strip())
+                    result = _extract_json(response.text)
                     return True, result
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     return False, {"error": "Could not parse optimization suggestions"}
             else:
                 return False, {"error": "No response generated"}
@@ -299,35 +993,16 @@ Respond in JSON format with optimized rules and explanations:
         
         try:
             if content_type == "tweet":
-                prompt = """
-Generate a natural, engaging tweet that a real person would post. It should:
-- Be under 280 characters
-- Sound authentic and human
-- Be about general topics like technology, business, lifestyle, or current events
-- Not be promotional or spam-like
-- Include appropriate hashtags (1-2 max)
-
-Return only the tweet text, nothing else.
-"""
+                prompt = _WARMUP_TWEET_PROMPT
             
             elif content_type == "reply":
-                prompt = f"""
-Generate a natural, engaging reply to a tweet. The reply should:
-- Be under 280 characters
-- Add value to the conversation
-- Sound like a real person's response
-- Not be spam-like or promotional
-- Be relevant to the original tweet context
-
-Target tweet context: {target_profile.get('tweet_text', 'General discussion') if target_profile else 'General discussion'}
-
-Return only the reply text, nothing else.
-"""
+                tweet_text = target_profile.get('tweet_text', 'General discussion') if target_profile else 'General discussion'
+                prompt = _WARMUP_REPLY_PROMPT.format(tweet_text=tweet_text)
             
             else:
                 return False, f"Unsupported content type: {content_type}"
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_content(prompt, 'warmup')
             
             if response.text:
                 content = response.text.strip()
@@ -344,65 +1019,149 @@ Return only the reply text, nothing else.
     def validate_message_quality(self, message: str, campaign_rules: Dict) -> Tuple[bool, Dict]:
         """
         Validate if a generated message meets quality standards
+        
+        Messages that fail the local hard checks (length, exclamation marks,
+        avoided words) are rejected without a Gemini request.
         """
         if not self.model:
             return True, {"score": 0.5, "issues": ["AI not configured"]}
         
         try:
-            prompt = f"""
-Evaluate this direct message for quality and compliance with the campaign rules.
-
-MESSAGE TO EVALUATE:
-"{message}"
-
-CAMPAIGN RULES:
-{json.dumps(campaign_rules, indent=2)}
-
-Rate the message on a scale of 0.0 to 1.0 based on:
-1. Adherence to campaign rules (0.3 weight)
-2. Natural/human-like tone (0.25 weight)  
-3. Personalization quality (0.2 weight)
-4. Engagement potential (0.15 weight)
-5. Spam/bot detection risk (0.1 weight - lower is better)
-
-Respond in JSON format:
-{{
-    "overall_score": 0.0-1.0,
-    "breakdown": {{
-        "rule_adherence": 0.0-1.0,
-        "natural_tone": 0.0-1.0,
-        "personalization": 0.0-1.0,
-        "engagement": 0.0-1.0,
-        "spam_risk": 0.0-1.0
-    }},
-    "issues": ["list of specific issues found"],
-    "suggestions": ["list of specific improvements"],
-    "approved": true/false
-}}
-"""
+            issues = self._hard_quality_issues(message, campaign_rules)
+            if issues:
+                return True, self._rejected_quality_result(issues)
             
-            response = self.model.generate_content(prompt)
+            cache_key = _validation_cache.make_key(message, campaign_rules)
+            cached = _validation_cache.get(cache_key)
+            if cached is not None:
+                # Stored serialized so callers can't mutate the cached result
+                return True, orjson.loads(cached)
+            
+            prompt = _VALIDATE_PROMPT.format(message=message, rules_json=json.dumps(campaign_rules, indent=2))
+            
+            response = self._generate_content(prompt, 'validation')
             
             if response.text:
                 try:
-                    result = json.loads(response.text.strip())
+                    result = _extract_json(response.text)
+                    _validation_cache.put(cache_key, orjson.dumps(result))
                     return True, result
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     # Fallback simple validation
-                    issues = []
-                    if len(message) > 280:
-                        issues.append("Message too long")
-                    if message.count('!') > 2:
-                        issues.append("Too many exclamation marks")
-                    
-                    return True, {
-                        "overall_score": 0.7 if len(issues) == 0 else 0.4,
-                        "issues": issues,
-                        "approved": len(issues) == 0
-                    }
+                    return True, self._basic_quality_check(message)
             else:
                 return False, {"error": "No response generated"}
                 
         except Exception as e:
             logger.error(f"Error validating message with Gemini: {str(e)}")
             return False, {"error": str(e)}
+    
+    def validate_message_quality_batch(self, messages: List[str],
+                                       campaign_rules: Dict) -> Tuple[bool, List[Dict]]:
+        """
+        Validate several generated messages with a single Gemini request
+        
+        Args:
+            messages: Messages to evaluate
+            campaign_rules: Campaign rules the messages should follow
+            
+        Returns:
+            Tuple of (success, results) where results[i] has the same shape as
+            validate_message_quality's result for messages[i]
+        """
+        if not self.model:
+            return True, [{"score": 0.5, "issues": ["AI not configured"]} for _ in messages]
+        
+        # Messages failing the local hard checks are rejected without
+        # being sent to Gemini
+        results = [None] * len(messages)
+        pending = []
+        try:
+            for i, message in enumerate(messages):
+                issues = self._hard_quality_issues(message, campaign_rules)
+                if issues:
+                    results[i] = self._rejected_quality_result(issues)
+                else:
+                    pending.append(i)
+            
+            # The rules are serialized once for all chunks
+            rules_json = json.dumps(campaign_rules, indent=2)
+        except Exception as e:
+            logger.error(f"Error validating message batch: {str(e)}")
+            return False, [{"error": str(e)}]
+        
+        # Large message lists are sent in chunks of BATCH_CHUNK_SIZE messages
+        for start in range(0, len(pending), BATCH_CHUNK_SIZE):
+            chunk = pending[start:start + BATCH_CHUNK_SIZE]
+            success, chunk_results = self._validate_message_chunk(
+                [messages[i] for i in chunk], rules_json
+            )
+            if not success:
+                return False, chunk_results
+            for i, result in zip(chunk, chunk_results):
+                results[i] = result
+        
+        return True, results
+    
+    def _validate_message_chunk(self, messages: List[str], rules_json: str) -> Tuple[bool, List[Dict]]:
+        """Validate one chunk of messages with a single Gemini request"""
+        try:
+            prompt = _VALIDATE_BATCH_PROMPT.format(
+                messages_json=json.dumps(messages, indent=2),
+                rules_json=rules_json,
+                count=len(messages)
+            )
+            
+            response = self._generate_content(prompt, 'batch')
+            
+            if response.text:
+                try:
+                    results = _extract_json(response.text)
+                    if isinstance(results, list) and len(results) == len(messages):
+                        return True, results
+                except orjson.JSONDecodeError:
+                    pass
+                
+                # Fallback simple validation
+                return True, [self._basic_quality_check(message) for message in messages]
+            else:
+                return False, [{"error": "No response generated"}]
+                
+        except Exception as e:
+            logger.error(f"Error validating message batch with Gemini: {str(e)}")
+            return False, [{"error": str(e)}]
+    
+    def _hard_quality_issues(self, message: str, campaign_rules: Optional[Dict]) -> List[str]:
+        """Local checks a message must pass before it is worth an AI review"""
+        issues = []
+        if len(message) > 280:
+            issues.append("Message too long")
+        if message.count('!') > 2:
+            issues.append("Too many exclamation marks")
+        
+        avoid_words = campaign_rules.get('avoid_words') if campaign_rules else None
+        if avoid_words:
+            lowered = message.lower()
+            for word in avoid_words:
+                if word and word.lower() in lowered:
+                    issues.append(f"Contains avoided word: {word}")
+        
+        return issues
+    
+    def _rejected_quality_result(self, issues: List[str]) -> Dict:
+        """Validation result for a message that failed the local hard checks"""
+        return {
+            "overall_score": 0.0,
+            "issues": issues,
+            "approved": False
+        }
+    
+    def _basic_quality_check(self, message: str) -> Dict:
+        """Local length/punctuation check used when the AI response can't be parsed"""
+        issues = self._hard_quality_issues(message, None)
+        
+        return {
+            "overall_score": 0.7 if len(issues) == 0 else 0.4,
+            "issues": issues,
+            "approved": len(issues) == 0
+        }
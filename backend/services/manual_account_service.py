@@ -3,16 +3,21 @@ Manual Account Service for login cookie management
 Handles manual addition of X accounts using login cookies
 """
 
-import json
+import base64
 import logging
+import orjson
 import re
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from flask import current_app
+from sqlalchemy import insert
 
 from models import db, TwitterAccount, User
 from services.cookie_encryption import CookieManager
 
+# twid cookie value, usually "u=1234567890" (quoted)
+_TWID_RE = re.compile(r'u=(\d+)')
+
 
 class ManualAccountService:
     """
@@ -23,6 +28,13 @@ class ManualAccountService:
         """Initialize the manual account service"""
         self.logger = logging.getLogger(__name__)
         self.cookie_manager = CookieManager()
+        self._cookie_expiration_hours = None
+    
+    def _expiration_hours(self) -> int:
+        """Cookie lifetime in hours, read from the app config on first use"""
+        if self._cookie_expiration_hours is None:
+            self._cookie_expiration_hours = current_app.config.get('COOKIE_EXPIRATION_HOURS', 720)  # 30 days default
+        return self._cookie_expiration_hours
     
     def add_account_by_cookie(self, user_id: int, login_cookie: str, 
                             account_name: Optional[str] = None) -> Tuple[bool, Dict[str, Any]]:
@@ -41,34 +53,42 @@ class ManualAccountService:
             ValueError: If user_id is invalid or cookie is malformed
         """
         try:
-            # Validate user exists
-            user = User.query.get(user_id)
-            if not user:
-                raise ValueError(f"User with ID {user_id} not found")
+            # Parse the cookie once for both validation and extraction
+            cookie_data, parse_error = self._parse_cookie(login_cookie)
             
             # Validate login cookie format and extract data
-            is_valid, cookie_data = self.validate_login_cookie(login_cookie)
+            if parse_error:
+                is_valid, validation_data = False, parse_error
+            else:
+                is_valid, validation_data = self._validate_parsed(cookie_data, len(login_cookie.strip()))
             if not is_valid:
                 return False, {
                     'error': 'Invalid login cookie format',
-                    'details': cookie_data.get('error', 'Cookie validation failed')
+                    'details': validation_data.get('error', 'Cookie validation failed')
                 }
             
-            # Extract account information from cookie
-            account_info = self.extract_account_info(login_cookie)
-            if not account_info.get('username'):
+            # Extract account information from cookie. The Twitter user ID
+            # identifies the account, so cookies without one are rejected
+            # rather than stored unmatched by the already-connected check.
+            account_info = self._extract_parsed(cookie_data)
+            if not account_info.get('user_id'):
                 return False, {
                     'error': 'Unable to extract account information from cookie',
                     'details': 'Cookie does not contain valid user identification'
                 }
             
-            # Check if account already exists for this user
-            existing_account = TwitterAccount.query.filter_by(
-                user_id=user_id,
-                twitter_user_id=account_info.get('user_id')
-            ).first()
+            # Validate user exists and check if the account is already
+            # connected for this user in one query
+            user_row = db.session.query(User.id, TwitterAccount.id).outerjoin(
+                TwitterAccount,
+                (TwitterAccount.user_id == User.id) &
+                (TwitterAccount.twitter_user_id == account_info.get('user_id'))
+            ).filter(User.id == user_id).first()
             
-            if existing_account:
+            if user_row is None:
+                raise ValueError(f"User with ID {user_id} not found")
+            
+            if user_row[1] is not None:
                 return False, {
                     'error': 'Account already connected',
                     'details': f"Account @{account_info['username']} is already connected to your profile"
@@ -77,34 +97,37 @@ class ManualAccountService:
             # Encrypt and store the login cookie
             encrypted_cookie = self.cookie_manager.store_cookie(
                 login_cookie, 
-                expiration_hours=current_app.config.get('COOKIE_EXPIRATION_HOURS', 720)  # 30 days default
+                expiration_hours=self._expiration_hours()
             )
             
-            # Create new TwitterAccount record
-            twitter_account = TwitterAccount(
-                user_id=user_id,
-                username=account_info['username'],
-                screen_name=account_info['username'],
-                name=account_name or account_info.get('display_name', account_info['username']),
-                twitter_user_id=account_info.get('user_id'),
-                login_cookie=encrypted_cookie,
-                connection_status='connected',
-                is_active=True
-            )
+            # Create new TwitterAccount record; RETURNING gives the id and
+            # created_at without reloading the row after the commit
+            display_name = account_name or account_info.get('display_name', account_info['username'])
+            account_row = db.session.execute(
+                insert(TwitterAccount).values(
+                    user_id=user_id,
+                    username=account_info['username'],
+                    screen_name=account_info['username'],
+                    name=display_name,
+                    twitter_user_id=account_info.get('user_id'),
+                    login_cookie=encrypted_cookie,
+                    connection_status='connected',
+                    is_active=True
+                ).returning(TwitterAccount.id, TwitterAccount.created_at)
+            ).one()
             
             # Save to database
-            db.session.add(twitter_account)
             db.session.commit()
             
             self.logger.info(f"Successfully added manual account @{account_info['username']} for user {user_id}")
             
             return True, {
-                'account_id': twitter_account.id,
+                'account_id': account_row.id,
                 'username': account_info['username'],
-                'display_name': twitter_account.name,
+                'display_name': display_name,
                 'user_id': account_info.get('user_id'),
                 'connection_status': 'connected',
-                'created_at': twitter_account.created_at.isoformat()
+                'created_at': account_row.created_at.isoformat()
             }
             
         except ValueError as e:
@@ -119,6 +142,137 @@ class ManualAccountService:
                 'details': 'An unexpected error occurred while adding the account'
             }
     
+    def add_accounts_by_cookie(self, user_id: int,
+                               login_cookies: List[str]) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Add several Twitter accounts using login cookies in one transaction
+        
+        Cookies that fail validation or belong to an account that is already
+        connected are reported in 'errors' and skipped; the rest are inserted
+        together with a single commit.
+        
+        Args:
+            user_id: ID of the user adding the accounts
+            login_cookies: List of raw login cookie strings
+            
+        Returns:
+            Tuple of (success, result_data) where result_data holds the
+            added 'accounts' and per-cookie 'errors' (by list index)
+        """
+        try:
+            errors = []
+            pending = []
+            
+            for index, login_cookie in enumerate(login_cookies):
+                cookie_data, parse_error = self._parse_cookie(login_cookie)
+                if parse_error:
+                    is_valid, validation_data = False, parse_error
+                else:
+                    is_valid, validation_data = self._validate_parsed(cookie_data, len(login_cookie.strip()))
+                if not is_valid:
+                    errors.append({
+                        'index': index,
+                        'error': 'Invalid login cookie format',
+                        'details': validation_data.get('error', 'Cookie validation failed')
+                    })
+                    continue
+                
+                # Same rule as add_account_by_cookie: no user ID, no account
+                account_info = self._extract_parsed(cookie_data)
+                if not account_info.get('user_id'):
+                    errors.append({
+                        'index': index,
+                        'error': 'Unable to extract account information from cookie',
+                        'details': 'Cookie does not contain valid user identification'
+                    })
+                    continue
+                
+                pending.append((index, login_cookie, account_info))
+            
+            if not pending:
+                return False, {'accounts': [], 'errors': errors}
+            
+            if db.session.get(User, user_id) is None:
+                raise ValueError(f"User with ID {user_id} not found")
+            
+            # One query finds every account in the batch that's already
+            # connected for this user
+            twitter_user_ids = {info.get('user_id') for _, _, info in pending}
+            existing_ids = {
+                row[0] for row in db.session.query(TwitterAccount.twitter_user_id).filter(
+                    TwitterAccount.user_id == user_id,
+                    TwitterAccount.twitter_user_id.in_(twitter_user_ids)
+                )
+            }
+            
+            expiration_hours = self._expiration_hours()
+            rows = []
+            accounts = []
+            for index, login_cookie, account_info in pending:
+                twitter_user_id = account_info.get('user_id')
+                if twitter_user_id in existing_ids:
+                    errors.append({
+                        'index': index,
+                        'error': 'Account already connected',
+                        'details': f"Account @{account_info['username']} is already connected to your profile"
+                    })
+                    continue
+                # Also catches the same account submitted twice in the batch
+                existing_ids.add(twitter_user_id)
+                
+                display_name = account_info.get('display_name', account_info['username'])
+                rows.append({
+                    'user_id': user_id,
+                    'username': account_info['username'],
+                    'screen_name': account_info['username'],
+                    'name': display_name,
+                    'twitter_user_id': twitter_user_id,
+                    'login_cookie': self.cookie_manager.store_cookie(
+                        login_cookie, expiration_hours=expiration_hours
+                    ),
+                    'connection_status': 'connected',
+                    'is_active': True
+                })
+                accounts.append({
+                    'username': account_info['username'],
+                    'display_name': display_name,
+                    'user_id': twitter_user_id,
+                    'connection_status': 'connected'
+                })
+            
+            if rows:
+                # Bulk INSERT ... RETURNING; sort_by_parameter_order keeps the
+                # returned rows in the same order as the parameter list
+                account_rows = db.session.execute(
+                    insert(TwitterAccount).returning(
+                        TwitterAccount.id, TwitterAccount.created_at,
+                        sort_by_parameter_order=True
+                    ),
+                    rows
+                ).all()
+                db.session.commit()
+                
+                for account, account_row in zip(accounts, account_rows):
+                    account['account_id'] = account_row.id
+                    account['created_at'] = account_row.created_at.isoformat()
+                
+                self.logger.info(f"Successfully added {len(rows)} manual accounts for user {user_id}")
+            
+            errors.sort(key=lambda error: error['index'])
+            return bool(rows), {'accounts': accounts, 'errors': errors}
+            
+        except ValueError as e:
+            self.logger.error(f"Validation error in add_accounts_by_cookie: {str(e)}")
+            return False, {'error': 'Validation error', 'details': str(e)}
+        
+        except Exception as e:
+            self.logger.error(f"Error adding accounts by cookie: {str(e)}")
+            db.session.rollback()
+            return False, {
+                'error': 'Failed to add accounts',
+                'details': 'An unexpected error occurred while adding the accounts'
+            }
+    
     def validate_login_cookie(self, login_cookie: str) -> Tuple[bool, Dict[str, Any]]:
         """
         Validate login cookie format and extract basic data
@@ -129,41 +283,105 @@ class ManualAccountService:
         Returns:
             Tuple of (is_valid, validation_data)
         """
+        cookie_data, parse_error = self._parse_cookie(login_cookie)
+        if parse_error:
+            return False, parse_error
+        
+        return self._validate_parsed(cookie_data, len(login_cookie.strip()))
+    
+    def extract_account_info(self, login_cookie: str) -> Dict[str, str]:
+        """
+        Extract account information from login cookie
+        
+        Args:
+            login_cookie: Raw login cookie string (can be response JSON or direct cookie)
+            
+        Returns:
+            Dictionary with extracted account information
+        """
+        cookie_data, parse_error = self._parse_cookie(login_cookie)
+        if parse_error:
+            return {}
+        
+        return self._extract_parsed(cookie_data)
+    
+    def _parse_cookie(self, login_cookie: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Parse a raw login cookie into its cookie fields
+        
+        Accepts a response JSON with a (base64 or JSON) login_cookies field,
+        a direct cookie JSON, or a key=value; cookie string.
+        
+        Args:
+            login_cookie: Raw login cookie string
+            
+        Returns:
+            Tuple of (cookie_data, error); error is a validation_data dict
+            when the cookie can't be parsed
+        """
         try:
             if not login_cookie or not isinstance(login_cookie, str):
-                return False, {'error': 'Cookie must be a non-empty string'}
+                return None, {'error': 'Cookie must be a non-empty string'}
             
             # Clean up the cookie string (remove extra whitespace, newlines)
             cleaned_cookie = login_cookie.strip()
             
-            # Try to parse as JSON first
-            try:
-                parsed_data = json.loads(cleaned_cookie)
-                
-                # Check if this is a response format with login_cookies field
-                if isinstance(parsed_data, dict) and 'login_cookies' in parsed_data:
-                    # Extract the actual cookie data from login_cookies field
-                    login_cookies_str = parsed_data['login_cookies']
+            # Only text starting with { or [ can be a JSON cookie; anything
+            # else goes straight to the key=value check rather than
+            # through a failing JSON parse
+            is_json = cleaned_cookie[:1] in ('{', '[')
+            if is_json:
+                try:
+                    parsed_data = orjson.loads(cleaned_cookie)
                     
-                    # Decode base64 if needed
-                    import base64
-                    try:
-                        decoded_cookies = base64.b64decode(login_cookies_str).decode('utf-8')
-                        cookie_data = json.loads(decoded_cookies)
-                    except:
-                        # If base64 decode fails, try direct JSON parse
-                        cookie_data = json.loads(login_cookies_str)
-                else:
-                    # Direct cookie JSON format
-                    cookie_data = parsed_data
-                    
-            except json.JSONDecodeError:
+                    # Check if this is a response format with login_cookies field
+                    if isinstance(parsed_data, dict) and 'login_cookies' in parsed_data:
+                        # Extract the actual cookie data from login_cookies field
+                        login_cookies_str = parsed_data['login_cookies']
+                        
+                        # Plain JSON cookies start with { or [, which can't start
+                        # base64 text, so skip the decode attempt for them
+                        if isinstance(login_cookies_str, str) and login_cookies_str.lstrip()[:1] in ('{', '['):
+                            cookie_data = orjson.loads(login_cookies_str)
+                        else:
+                            # Decode base64 if needed
+                            try:
+                                # orjson parses (and UTF-8 validates) the bytes directly
+                                cookie_data = orjson.loads(base64.b64decode(login_cookies_str))
+                            except:
+                                # If base64 decode fails, try direct JSON parse
+                                cookie_data = orjson.loads(login_cookies_str)
+                    else:
+                        # Direct cookie JSON format
+                        cookie_data = parsed_data
+                except orjson.JSONDecodeError:
+                    is_json = False
+            
+            if not is_json:
                 # If not JSON, check if it's in key=value format
                 if '=' in cleaned_cookie and ';' in cleaned_cookie:
                     cookie_data = self._parse_cookie_string(cleaned_cookie)
                 else:
-                    return False, {'error': 'Cookie must be in JSON format, response format with login_cookies field, or standard cookie format'}
+                    return None, {'error': 'Cookie must be in JSON format, response format with login_cookies field, or standard cookie format'}
+            
+            return cookie_data, None
             
+        except Exception as e:
+            self.logger.error(f"Cookie parsing error: {str(e)}")
+            return None, {'error': f'Cookie validation failed: {str(e)}'}
+    
+    def _validate_parsed(self, cookie_data: Dict[str, Any], cookie_size: int) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Validate parsed cookie fields
+        
+        Args:
+            cookie_data: Cookie fields from _parse_cookie
+            cookie_size: Length of the cleaned raw cookie string
+            
+        Returns:
+            Tuple of (is_valid, validation_data)
+        """
+        try:
             # Validate required fields for TwitterAPI.io
             required_fields = ['auth_token']
             missing_fields = []
@@ -199,60 +417,31 @@ class ManualAccountService:
                 'fields_found': list(cookie_data.keys()),
                 'has_auth_token': bool(cookie_data.get('auth_token')),
                 'has_user_id': has_user_id,
-                'cookie_size': len(cleaned_cookie)
+                'cookie_size': cookie_size
             }
             
         except Exception as e:
             self.logger.error(f"Cookie validation error: {str(e)}")
             return False, {'error': f'Cookie validation failed: {str(e)}'}
     
-    def extract_account_info(self, login_cookie: str) -> Dict[str, str]:
+    def _extract_parsed(self, cookie_data: Dict[str, Any]) -> Dict[str, str]:
         """
-        Extract account information from login cookie
+        Extract account information from parsed cookie fields
         
         Args:
-            login_cookie: Raw login cookie string (can be response JSON or direct cookie)
+            cookie_data: Cookie fields from _parse_cookie
             
         Returns:
             Dictionary with extracted account information
         """
         try:
-            # Clean and parse cookie
-            cleaned_cookie = login_cookie.strip()
-            
-            try:
-                parsed_data = json.loads(cleaned_cookie)
-                
-                # Check if this is a response format with login_cookies field
-                if isinstance(parsed_data, dict) and 'login_cookies' in parsed_data:
-                    # Extract the actual cookie data from login_cookies field
-                    login_cookies_str = parsed_data['login_cookies']
-                    
-                    # Decode base64 if needed
-                    import base64
-                    try:
-                        decoded_cookies = base64.b64decode(login_cookies_str).decode('utf-8')
-                        cookie_data = json.loads(decoded_cookies)
-                    except:
-                        # If base64 decode fails, try direct JSON parse
-                        cookie_data = json.loads(login_cookies_str)
-                else:
-                    # Direct cookie JSON format
-                    cookie_data = parsed_data
-                    
-            except json.JSONDecodeError:
-                if '=' in cleaned_cookie and ';' in cleaned_cookie:
-                    cookie_data = self._parse_cookie_string(cleaned_cookie)
-                else:
-                    return {}
-            
             account_info = {}
             
             # Extract user ID from twid field
             twid = cookie_data.get('twid', '')
             if twid:
                 # twid format is usually "u=1234567890" (quoted)
-                user_id_match = re.search(r'u=(\d+)', twid.strip('"'))
+                user_id_match = _TWID_RE.search(twid.strip('"'))
                 if user_id_match:
                     account_info['user_id'] = user_id_match.group(1)
             
@@ -306,8 +495,9 @@ class ManualAccountService:
             pairs = cookie_string.split(';')
             
             for pair in pairs:
-                if '=' in pair:
-                    key, value = pair.split('=', 1)
+                # partition finds the first '=' and splits in one pass
+                key, separator, value = pair.partition('=')
+                if separator:
                     key = key.strip()
                     value = value.strip()
                     
@@ -343,9 +533,10 @@ class ManualAccountService:
             if not account:
                 return None
             
-            # Check cookie validity
+            # Check cookie validity; cookies already marked expired aren't
+            # decrypted again
             cookie_valid = False
-            if account.login_cookie:
+            if account.login_cookie and account.connection_status != 'expired':
                 cookie_valid = self.cookie_manager.is_cookie_valid(account.login_cookie)
             
             return {
@@ -396,24 +587,27 @@ class ManualAccountService:
             # Encrypt and store new cookie
             encrypted_cookie = self.cookie_manager.store_cookie(
                 new_cookie,
-                expiration_hours=current_app.config.get('COOKIE_EXPIRATION_HOURS', 720)
+                expiration_hours=self._expiration_hours()
             )
             
-            # Update account
+            # Update account; the response is built from values read before
+            # the commit so the expired instance isn't reloaded
+            now = datetime.utcnow()
             account.login_cookie = encrypted_cookie
             account.connection_status = 'connected'
-            account.updated_at = datetime.utcnow()
+            account.updated_at = now
+            result = {
+                'account_id': account.id,
+                'username': account.username,
+                'connection_status': 'connected',
+                'updated_at': now.isoformat()
+            }
             
             db.session.commit()
             
             self.logger.info(f"Successfully refreshed cookie for account {account_id}")
             
-            return True, {
-                'account_id': account.id,
-                'username': account.username,
-                'connection_status': 'connected',
-                'updated_at': account.updated_at.isoformat()
-            }
+            return True, result
             
         except Exception as e:
             self.logger.error(f"Error refreshing account cookie: {str(e)}")
@@ -9,6 +9,10 @@ from typing import List, Dict, Optional, Tuple, Any
 from datetime import datetime
 from dataclasses import dataclass
 
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
 from models import db, Campaign, CampaignTarget, TwitterAccount
 from services.twitterapi_client import TwitterAPIClient, TwitterUser, TwitterAPIError
 
@@ -359,37 +363,61 @@ class TargetScraperService:
         Raises:
             Exception: If database operation fails
         """
-        stored_count = 0
+        if not targets:
+            return 0
+        
+        rows = [
+            {
+                'campaign_id': campaign_id,
+                'twitter_user_id': target.id,
+                'username': target.username,
+                'display_name': target.name,
+                'bio': target.description,
+                'profile_picture': target.profile_picture,
+                'follower_count': target.followers_count,
+                'following_count': target.following_count,
+                'is_verified': target.is_verified or target.is_blue_verified,
+                'can_dm': target.can_dm,
+                'status': 'pending'
+            }
+            for target in targets
+        ]
         
         try:
-            for target in targets:
-                # Check if target already exists for this campaign
-                existing_target = CampaignTarget.query.filter_by(
-                    campaign_id=campaign_id,
-                    twitter_user_id=target.id
-                ).first()
-                
-                if existing_target:
-                    self.logger.debug(f"Target {target.username} already exists for campaign {campaign_id}")
-                    continue
-                
-                # Create new campaign target
-                campaign_target = CampaignTarget(
-                    campaign_id=campaign_id,
-                    twitter_user_id=target.id,
-                    username=target.username,
-                    display_name=target.name,
-                    bio=target.description,
-                    profile_picture=target.profile_picture,
-                    follower_count=target.followers_count,
-                    following_count=target.following_count,
-                    is_verified=target.is_verified or target.is_blue_verified,
-                    can_dm=target.can_dm,
-                    status='pending'
-                )
-                
-                db.session.add(campaign_target)
-                stored_count += 1
+            dialect = db.session.get_bind().dialect.name
+            
+            if dialect in ('postgresql', 'sqlite'):
+                # Let the (campaign_id, twitter_user_id) unique index drop
+                # targets that are already stored, including ones inserted
+                # concurrently by another scrape; RETURNING yields only the
+                # rows actually added
+                dialect_insert = pg_insert if dialect == 'postgresql' else sqlite_insert
+                stmt = dialect_insert(CampaignTarget).values(rows).on_conflict_do_nothing(
+                    index_elements=['campaign_id', 'twitter_user_id']
+                ).returning(CampaignTarget.id)
+                stored_count = len(db.session.execute(stmt).scalars().all())
+            else:
+                # No portable upsert: filter out stored targets with one
+                # lookup, then insert the rest
+                existing_ids = set(db.session.execute(
+                    select(CampaignTarget.twitter_user_id).where(
+                        CampaignTarget.campaign_id == campaign_id,
+                        CampaignTarget.twitter_user_id.in_([row['twitter_user_id'] for row in rows])
+                    )
+                ).scalars())
+                new_rows = []
+                for row in rows:
+                    if row['twitter_user_id'] in existing_ids:
+                        continue
+                    existing_ids.add(row['twitter_user_id'])
+                    new_rows.append(row)
+                if new_rows:
+                    db.session.execute(insert(CampaignTarget), new_rows)
+                stored_count = len(new_rows)
+            
+            skipped = len(rows) - stored_count
+            if skipped:
+                self.logger.debug(f"Skipped {skipped} targets already stored for campaign {campaign_id}")
             
             # Commit all targets at once
             db.session.commit()
@@ -14,7 +14,8 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from services.bulk_dm_service import (
     BulkDMService, RateLimiter, MessagePersonalizer, 
-    BulkDMProgress, BulkDMResult, send_bulk_dms, get_sending_progress
+    BulkDMProgress, BulkDMResult, send_bulk_dms, get_sending_progress,
+    TARGET_CLAIM_LEASE
 )
 from models import Campaign, CampaignTarget, CampaignMessage, TwitterAccount, db
 from twitterio.dm import DMSendResult, TwitterAPIError
@@ -91,8 +92,15 @@ class TestRateLimiter:
         assert limiter.can_send() is False
         
         # Simulate next day
-        limiter.daily_reset_time = datetime.now() - timedelta(hours=1)
+        limiter.daily_reset_time = datetime.utcnow() - timedelta(hours=1)
         assert limiter.can_send() is True
+    
+    def test_daily_reset_at_utc_midnight(self):
+        """Test the daily window rolls over with the UTC date like the campaign counter"""
+        limiter = RateLimiter()
+        
+        next_utc_midnight = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        assert limiter.daily_reset_time == next_utc_midnight
 
 
 class TestMessagePersonalizer:
@@ -276,6 +284,7 @@ class TestBulkDMService:
         # Setup mocks
         mock_campaign.query.get.return_value = self.campaign
         mock_target.query.filter_by.return_value.filter.return_value.all.return_value = [self.target1, self.target2]
+        mock_target.claimed_at = CampaignTarget.claimed_at
         
         # Mock DM client
         dm_client_instance = Mock()
@@ -303,11 +312,44 @@ class TestBulkDMService:
             assert result.failed_count == 0
             assert result.status == "completed"
     
+    @patch('services.bulk_dm_service.db')
+    @patch('services.bulk_dm_service.CampaignTarget')
+    @patch('services.bulk_dm_service.Campaign')
+    def test_start_campaign_sending_leaves_stale_daily_counter(self, mock_campaign, mock_target, mock_db):
+        """Test a counter from a previous day is left for the atomic claim to roll over"""
+        self.campaign.messages_sent_today = 50
+        self.campaign.messages_sent_day = datetime.utcnow().date() - timedelta(days=1)
+        mock_campaign.query.get.return_value = self.campaign
+        mock_target.query.filter_by.return_value.filter.return_value.count.return_value = 2
+        mock_target.claimed_at = CampaignTarget.claimed_at
+        
+        with patch.object(self.service, '_send_dm_batch') as mock_send_batch:
+            mock_send_batch.return_value = BulkDMResult(
+                campaign_id=1,
+                total_targets=2,
+                sent_count=0,
+                failed_count=0,
+                errors=[],
+                duration_seconds=0.0,
+                status="completed"
+            )
+            
+            self.service.start_campaign_sending(1)
+        
+        # Not reset in Python, where a stale instance could overwrite
+        # slots another sender already claimed today
+        assert self.campaign.messages_sent_today == 50
+        assert self.campaign.messages_sent_day == datetime.utcnow().date() - timedelta(days=1)
+        
+        # Yesterday's sends don't count against today's limit
+        rate_limiter = mock_send_batch.call_args.kwargs['rate_limiter']
+        assert rate_limiter.sent_today == 0
+        assert rate_limiter.can_send() is True
+    
     @patch('services.bulk_dm_service.TwitterDMClient')
     @patch('services.bulk_dm_service.Campaign')
-    @patch('services.bulk_dm_service.CampaignMessage')
     @patch('services.bulk_dm_service.db')
-    def test_send_dm_batch_with_failures(self, mock_db, mock_campaign_message, mock_campaign, mock_dm_client):
+    def test_send_dm_batch_with_failures(self, mock_db, mock_campaign, mock_dm_client):
         """Test DM batch sending with some failures"""
         # Mock DM client
         dm_client_instance = Mock()
@@ -335,13 +377,18 @@ class TestBulkDMService:
             failed=0
         )
         
-        result = self.service._send_dm_batch(
-            targets=[self.target1, self.target2],
-            campaign=self.campaign,
-            twitter_account=self.twitter_account,
-            rate_limiter=rate_limiter,
-            progress=progress
-        )
+        with patch.object(self.service, '_claim_daily_slot', return_value=True), \
+             patch.object(self.service, '_release_daily_slot') as mock_release:
+            result = self.service._send_dm_batch(
+                targets=[self.target1, self.target2],
+                campaign=self.campaign,
+                twitter_account=self.twitter_account,
+                rate_limiter=rate_limiter,
+                progress=progress
+            )
+        
+        # The failed send gives its daily slot back
+        mock_release.assert_called_once_with(1)
         
         assert result.sent_count == 1
         assert result.failed_count == 1
@@ -547,7 +594,16 @@ class TestIntegrationScenarios:
         target2.status = 'pending'
         target2.can_dm = True
         
-        mock_target.query.filter_by.return_value.filter.return_value.all.return_value = [target1, target2]
+        pending_query = mock_target.query.filter_by.return_value.filter.return_value
+        pending_query.count.return_value = 2
+        candidates = pending_query.with_entities.return_value.filter.return_value.order_by.return_value
+        candidates.limit.return_value.with_for_update.return_value.all.side_effect = [
+            [target1, target2], []
+        ]
+        mock_target.query.filter.return_value.order_by.return_value.all.return_value = [target1, target2]
+        mock_target.id = CampaignTarget.id
+        mock_target.status = CampaignTarget.status
+        mock_target.claimed_at = CampaignTarget.claimed_at
         
         # Setup DM client
         dm_client_instance = Mock()
@@ -555,7 +611,9 @@ class TestIntegrationScenarios:
         dm_client_instance.send_dm.return_value = DMSendResult(message_id="msg123", status="sent")
         
         # Run campaign
-        result = self.service.start_campaign_sending(1)
+        with patch.object(self.service, '_claim_daily_slot', return_value=True), \
+             patch.object(self.service, '_claim_targets', return_value=[1, 2]):
+            result = self.service.start_campaign_sending(1)
         
         # Verify results
         assert result.campaign_id == 1
@@ -566,8 +624,233 @@ class TestIntegrationScenarios:
         
         # Verify campaign status was updated
         assert campaign.status == 'completed'
-        assert campaign.messages_sent == 2
+        
+        # messages_sent is incremented in SQL rather than assigned
+        mock_campaign.query.filter_by.assert_any_call(id=1)
+        assert mock_campaign.query.filter_by.return_value.update.called
+
+
+@pytest.fixture
+def db_app():
+    """Create a Flask app backed by an in-memory database"""
+    from flask import Flask
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(app)
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def db_campaign(db_app):
+    """Create a campaign with three pending targets"""
+    from models import User
+    user = User(email='test@example.com', username='testuser', password_hash='hashed_password')
+    db.session.add(user)
+    db.session.commit()
+    
+    account = TwitterAccount(user_id=user.id, username='sender', login_cookie='test_cookie')
+    db.session.add(account)
+    db.session.commit()
+    
+    campaign = Campaign(
+        user_id=user.id,
+        twitter_account_id=account.id,
+        name='Test Campaign',
+        target_type='manual_list',
+        target_identifier='manual',
+        message_template='Hello {name}!',
+        daily_limit=50,
+        delay_min=0,
+        delay_max=0,
+        status='paused'
+    )
+    db.session.add(campaign)
+    db.session.commit()
+    
+    for i in range(3):
+        db.session.add(CampaignTarget(
+            campaign_id=campaign.id,
+            twitter_user_id=str(100 + i),
+            username=f'target{i}'
+        ))
+    db.session.commit()
+    return campaign
+
+
+def target_statuses(campaign_id):
+    """Sorted statuses of a campaign's targets"""
+    return sorted(
+        target.status for target in CampaignTarget.query.filter_by(campaign_id=campaign_id)
+    )
+
+
+class TestTargetClaimLease:
+    """Test recovery of targets claimed by a sender that died"""
+    
+    def _crash_after_claiming(self, service, campaign_id, expire=False):
+        """Claim every target the way a sender does, then never release them"""
+        target_ids = [target.id for target in CampaignTarget.query.filter_by(campaign_id=campaign_id)]
+        claimed = service._claim_targets(target_ids)
+        
+        if expire:
+            # Nothing renewed the lease after the sender died
+            CampaignTarget.query.filter_by(campaign_id=campaign_id).update(
+                {CampaignTarget.claimed_at: datetime.utcnow() - TARGET_CLAIM_LEASE - timedelta(minutes=1)}
+            )
+        
+        db.session.commit()
+        return claimed
+    
+    def test_live_claims_are_kept(self, db_campaign):
+        """Test claims inside their lease are not released"""
+        service = BulkDMService()
+        assert len(self._crash_after_claiming(service, db_campaign.id)) == 3
+        
+        assert service.release_stale_claims(db_campaign.id) == 0
+        assert target_statuses(db_campaign.id) == ['in_progress'] * 3
+    
+    def test_expired_claims_are_released(self, db_campaign):
+        """Test claims left behind by a crashed sender go back to pending"""
+        service = BulkDMService()
+        self._crash_after_claiming(service, db_campaign.id, expire=True)
+        
+        assert service.release_stale_claims(db_campaign.id) == 3
+        db.session.commit()
+        
+        assert target_statuses(db_campaign.id) == ['pending'] * 3
+        assert all(
+            target.claimed_at is None
+            for target in CampaignTarget.query.filter_by(campaign_id=db_campaign.id)
+        )
+    
+    @patch('services.bulk_dm_service.TwitterDMClient')
+    def test_next_run_sends_to_crashed_claims(self, mock_dm_client, db_campaign):
+        """Test a run after a crash sends to the abandoned targets and completes"""
+        service = BulkDMService()
+        self._crash_after_claiming(service, db_campaign.id, expire=True)
+        mock_dm_client.return_value.send_dm.return_value = DMSendResult(message_id="msg123", status="sent")
+        
+        result = service.start_campaign_sending(db_campaign.id)
+        
+        assert result.total_targets == 3
+        assert result.sent_count == 3
+        assert target_statuses(db_campaign.id) == ['sent'] * 3
+        assert db.session.get(Campaign, db_campaign.id).status == 'completed'
 
+class TestDailyLimitRuns:
+    """Test campaigns that stop at their daily limit carry on later"""
+    
+    @patch('services.bulk_dm_service.TwitterDMClient')
+    def test_daily_limit_keeps_campaign_active(self, mock_dm_client, db_campaign):
+        """Test a run stopped by the daily limit leaves the campaign active"""
+        mock_dm_client.return_value.send_dm.return_value = DMSendResult(message_id="msg123", status="sent")
+        db_campaign.daily_limit = 2
+        db.session.commit()
+        
+        result = BulkDMService().start_campaign_sending(db_campaign.id)
+        
+        assert result.status == 'daily_limit_reached'
+        assert result.sent_count == 2
+        assert db.session.get(Campaign, db_campaign.id).status == 'active'
+        assert target_statuses(db_campaign.id) == ['pending', 'sent', 'sent']
+    
+    @patch('services.bulk_dm_service.TwitterDMClient')
+    def test_next_day_run_continues_campaign(self, mock_dm_client, db_campaign):
+        """Test the next run after the UTC rollover sends the rest"""
+        mock_dm_client.return_value.send_dm.return_value = DMSendResult(message_id="msg123", status="sent")
+        db_campaign.daily_limit = 2
+        db.session.commit()
+        service = BulkDMService()
+        service.start_campaign_sending(db_campaign.id)
+        
+        # Same day: nothing more goes out
+        result = service.start_campaign_sending(db_campaign.id)
+        assert result.sent_count == 0
+        assert result.status == 'daily_limit_reached'
+        
+        # Next UTC day
+        Campaign.query.filter_by(id=db_campaign.id).update(
+            {Campaign.messages_sent_day: datetime.utcnow().date() - timedelta(days=1)}
+        )
+        db.session.commit()
+        
+        result = service.start_campaign_sending(db_campaign.id)
+        
+        assert result.sent_count == 1
+        assert target_statuses(db_campaign.id) == ['sent'] * 3
+        assert db.session.get(Campaign, db_campaign.id).status == 'completed'
+    
+    @patch('services.bulk_dm_service.TwitterDMClient')
+    def test_max_targets_keeps_campaign_active(self, mock_dm_client, db_campaign):
+        """Test a capped run leaves the campaign active while targets remain"""
+        mock_dm_client.return_value.send_dm.return_value = DMSendResult(message_id="msg123", status="sent")
+        
+        result = BulkDMService().start_campaign_sending(db_campaign.id, max_targets=2)
+        
+        assert result.sent_count == 2
+        assert db.session.get(Campaign, db_campaign.id).status == 'active'
+        
+        # Unprocessed targets from the claimed chunk are handed back
+        assert target_statuses(db_campaign.id) == ['pending', 'sent', 'sent']
+    
+    @patch('services.bulk_dm_service.TwitterDMClient')
+    def test_later_runs_keep_started_at(self, mock_dm_client, db_campaign):
+        """Test resuming an active campaign doesn't move its start time"""
+        mock_dm_client.return_value.send_dm.return_value = DMSendResult(message_id="msg123", status="sent")
+        service = BulkDMService()
+        service.start_campaign_sending(db_campaign.id, max_targets=1)
+        started_at = db.session.get(Campaign, db_campaign.id).started_at
+        
+        service.start_campaign_sending(db_campaign.id, max_targets=1)
+        
+        assert started_at is not None
+        assert db.session.get(Campaign, db_campaign.id).started_at == started_at
+    
+    @patch('services.bulk_dm_service.TwitterDMClient')
+    def test_failed_last_run_keeps_earlier_sends(self, mock_dm_client, db_campaign):
+        """Test a final run whose targets all fail completes a campaign that already sent DMs"""
+        mock_dm_client.return_value.send_dm.side_effect = [
+            DMSendResult(message_id="msg123", status="sent"),
+            DMSendResult(message_id="msg124", status="sent"),
+            TwitterAPIError("User not found")
+        ]
+        service = BulkDMService()
+        service.start_campaign_sending(db_campaign.id, max_targets=2)
+        
+        result = service.start_campaign_sending(db_campaign.id, max_targets=2)
+        
+        assert (result.sent_count, result.failed_count) == (0, 1)
+        campaign = db.session.get(Campaign, db_campaign.id)
+        assert campaign.messages_sent == 2
+        assert campaign.status == 'completed'
+    
+    @patch('services.bulk_dm_service.TwitterDMClient')
+    def test_campaign_without_sends_fails(self, mock_dm_client, db_campaign):
+        """Test a campaign whose every target failed is marked failed"""
+        mock_dm_client.return_value.send_dm.side_effect = TwitterAPIError("User not found")
+        
+        BulkDMService().start_campaign_sending(db_campaign.id)
+        
+        assert db.session.get(Campaign, db_campaign.id).status == 'failed'
+    
+    def test_has_live_claims(self, db_campaign):
+        """Test only unexpired claims count as a sender at work"""
+        service = BulkDMService()
+        assert service.has_live_claims(db_campaign.id) is False
+        
+        target = CampaignTarget.query.filter_by(campaign_id=db_campaign.id).first()
+        service._claim_targets([target.id])
+        db.session.commit()
+        assert service.has_live_claims(db_campaign.id) is True
+        
+        target.claimed_at = datetime.utcnow() - TARGET_CLAIM_LEASE - timedelta(minutes=1)
+        db.session.commit()
+        assert service.has_live_claims(db_campaign.id) is False
 
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file
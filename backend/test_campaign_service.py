@@ -100,7 +100,7 @@ class TestCampaignService:
         assert campaign.personalization_enabled is True
         
         # Check AI rules are stored as JSON
-        ai_rules = json.loads(campaign.ai_rules)
+        ai_rules = campaign.ai_rules
         assert ai_rules['tone'] == 'friendly'
         assert ai_rules['style'] == 'casual'
     
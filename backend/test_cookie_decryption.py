@@ -39,7 +39,236 @@ def test_cookie_encryption_decryption():
     assert is_valid == True
     print("✓ Cookie validation successful")
     
+    # Test single-pass validate and retrieve
+    assert cookie_manager.retrieve_if_valid(encrypted_cookie) == test_cookie
+    assert cookie_manager.retrieve_if_valid("not-a-valid-token") is None
+    print("✓ Cookie retrieve_if_valid successful")
+    
+    # Test batch retrieval keeps input order
+    assert cookie_manager.retrieve_many([encrypted_cookie, "", encrypted_cookie]) == [test_cookie, None, test_cookie]
+    print("✓ Cookie retrieve_many successful")
+    
     print("✓ All cookie tests passed!")
 
+def test_validity_cache_keeps_no_cookie():
+    """Test repeated validity checks skip decryption without caching the cookie"""
+    from unittest.mock import patch
+    
+    os.environ['COOKIE_ENCRYPTION_KEY'] = 'test-encryption-key-for-testing-only'
+    
+    from services.cookie_encryption import CookieManager, _expiry_cache
+    
+    test_cookie = "auth_token=cached_secret_value_123"
+    cookie_manager = CookieManager()
+    encrypted_cookie = cookie_manager.store_cookie(test_cookie, expiration_hours=1)
+    
+    assert cookie_manager.is_cookie_valid(encrypted_cookie) == True
+    with patch.object(cookie_manager.encryption, '_decrypt_payload', side_effect=AssertionError):
+        assert cookie_manager.is_cookie_valid(encrypted_cookie) == True
+    assert "cached_secret_value" not in repr(list(_expiry_cache._entries.values()))
+    
+    # Expired tokens aren't cached as valid
+    expired_cookie = cookie_manager.store_cookie(test_cookie, expiration_hours=-1)
+    assert cookie_manager.is_cookie_valid(expired_cookie) == False
+    assert cookie_manager.retrieve_cookie(expired_cookie) is None
+    print("✓ Cookie validity cache successful")
+
+def test_retrieve_many_logs_one_summary():
+    """Test a batch with bad tokens logs one warning instead of an error per token"""
+    import logging
+    
+    os.environ['COOKIE_ENCRYPTION_KEY'] = 'test-encryption-key-for-testing-only'
+    
+    from services.cookie_encryption import CookieManager
+    
+    cookie_manager = CookieManager()
+    encrypted_cookie = cookie_manager.store_cookie("test_login_cookie_value_123456789")
+    
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger('services.cookie_encryption')
+    logger.addHandler(handler)
+    try:
+        results = cookie_manager.retrieve_many(["bad-token-1", encrypted_cookie, "bad-token-2"])
+    finally:
+        logger.removeHandler(handler)
+    
+    assert results == [None, "test_login_cookie_value_123456789", None]
+    assert [(record.levelname, record.getMessage()) for record in records] == [
+        ('WARNING', "Failed to decrypt 2 of 3 cookies")
+    ]
+    print("✓ Cookie retrieve_many logging successful")
+
+TEST_KEY = 'test-encryption-key-for-testing-only'
+
+def baseline_fernet(key):
+    """The Fernet cipher suite the baseline derived from COOKIE_ENCRYPTION_KEY"""
+    import base64
+    from cryptography.fernet import Fernet
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=b'twitterapi_salt', iterations=100000)
+    return Fernet(base64.urlsafe_b64encode(kdf.derive(key.encode())))
+
+def json_payload(cookie, expires_at):
+    """The JSON envelope encrypt_cookie wrote before the packed payload"""
+    import json
+    from datetime import datetime
+    
+    return json.dumps({
+        'cookie': cookie,
+        'encrypted_at': datetime.utcnow().isoformat(),
+        'expires_at': expires_at.isoformat() if expires_at else None
+    }).encode()
+
+def packed_payload(cookie, expires_at):
+    """The version 1 binary envelope: version byte, expiry epoch, cookie bytes"""
+    import calendar
+    import struct
+    
+    expires_epoch = calendar.timegm(expires_at.utctimetuple()) if expires_at else 0
+    return b'\x01' + struct.pack('>q', expires_epoch) + cookie.encode('utf-8')
+
+def test_decrypts_older_token_formats():
+    """Test tokens written by every earlier encrypt_cookie still decrypt"""
+    import base64
+    from datetime import datetime, timedelta
+    
+    os.environ['COOKIE_ENCRYPTION_KEY'] = TEST_KEY
+    
+    from services.cookie_encryption import CookieManager
+    
+    fernet = baseline_fernet(TEST_KEY)
+    writers = {
+        # Baseline: JSON envelope, Fernet token base64-encoded a second time
+        'double-encoded JSON': lambda cookie, expires_at: base64.urlsafe_b64encode(
+            fernet.encrypt(json_payload(cookie, expires_at))).decode(),
+        # Bare Fernet token around the JSON envelope
+        'bare Fernet JSON': lambda cookie, expires_at: fernet.encrypt(
+            json_payload(cookie, expires_at)).decode('ascii'),
+        # Bare Fernet token around the packed binary envelope
+        'packed binary': lambda cookie, expires_at: fernet.encrypt(
+            packed_payload(cookie, expires_at)).decode('ascii'),
+    }
+    
+    cookie_manager = CookieManager()
+    encryption = cookie_manager.encryption
+    test_cookie = "auth_token=older_format_cookie_123"
+    expires_at = (datetime.utcnow() + timedelta(hours=1)).replace(microsecond=0)
+    expired_at = (datetime.utcnow() - timedelta(hours=1)).replace(microsecond=0)
+    
+    for name, write in writers.items():
+        token = write(test_cookie, expires_at)
+        cookie_data = encryption.decrypt_cookie(token)
+        assert cookie_data['cookie'] == test_cookie, name
+        assert cookie_data['expires_at'] == expires_at, name
+        assert cookie_data['is_expired'] is False, name
+        assert abs(cookie_data['encrypted_at'] - datetime.utcnow()) < timedelta(minutes=1), name
+        assert cookie_manager.retrieve_cookie(token) == test_cookie, name
+        
+        never_expires = encryption.decrypt_cookie(write(test_cookie, None))
+        assert (never_expires['expires_at'], never_expires['is_expired']) == (None, False), name
+        
+        expired_token = write(test_cookie, expired_at)
+        assert encryption.decrypt_cookie(expired_token)['is_expired'] is True, name
+        assert cookie_manager.retrieve_cookie(expired_token) is None, name
+        assert cookie_manager.is_cookie_valid(expired_token) == False, name
+    
+    # Current v2 tokens, expired or not
+    assert cookie_manager.retrieve_cookie(cookie_manager.store_cookie(test_cookie, 1)) == test_cookie
+    assert cookie_manager.retrieve_cookie(cookie_manager.store_cookie(test_cookie, -1)) is None
+    print("✓ Older cookie formats decrypt successfully")
+
+def test_rejects_tampered_v2_header():
+    """Test a v2 token whose authenticated header was changed is rejected"""
+    import base64
+    import struct
+    
+    os.environ['COOKIE_ENCRYPTION_KEY'] = TEST_KEY
+    
+    from services.cookie_encryption import CookieManager, TOKEN_V2_PREFIX
+    
+    cookie_manager = CookieManager()
+    token = cookie_manager.store_cookie("test_login_cookie_value_123456789", expiration_hours=-1)
+    assert token.startswith(TOKEN_V2_PREFIX)
+    
+    # Push the expiry a year out without re-sealing the token
+    sealed = base64.urlsafe_b64decode(token[len(TOKEN_V2_PREFIX):])
+    expires_epoch, = struct.unpack_from('>q', sealed)
+    tampered = TOKEN_V2_PREFIX + base64.urlsafe_b64encode(
+        struct.pack('>q', expires_epoch + 365 * 86400) + sealed[8:]).decode('ascii')
+    
+    try:
+        cookie_manager.encryption.decrypt_cookie(tampered)
+        assert False, "Tampered v2 token was accepted"
+    except Exception as e:
+        assert "Failed to decrypt cookie" in str(e)
+    assert cookie_manager.retrieve_cookie(tampered) is None
+    assert cookie_manager.is_cookie_valid(tampered) == False
+    print("✓ Tampered v2 header rejected")
+
+def test_key_derivation_modes():
+    """Test the hkdf and raw COOKIE_KEY_KDF modes derive the documented keys"""
+    import base64
+    from cryptography.fernet import Fernet
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    
+    from services.cookie_encryption import CookieEncryption
+    
+    test_cookie = "test_login_cookie_value_123456789"
+    raw_key = Fernet.generate_key().decode()
+    hkdf_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=b'twitterapi_salt',
+                    info=b'fernet-cookie').derive(raw_key.encode())
+    modes = {
+        'hkdf': Fernet(base64.urlsafe_b64encode(hkdf_key)),
+        'raw': Fernet(raw_key.encode()),
+    }
+    
+    try:
+        for mode, fernet in modes.items():
+            os.environ['COOKIE_KEY_KDF'] = mode
+            encryption = CookieEncryption(raw_key)
+            
+            # Fernet tokens written with the independently derived key
+            token = fernet.encrypt(packed_payload(test_cookie, None)).decode('ascii')
+            assert encryption.decrypt_cookie(token)['cookie'] == test_cookie, mode
+            
+            v2_token = encryption._encrypt_with_expiry(test_cookie, 0)
+            assert encryption.decrypt_cookie(v2_token)['cookie'] == test_cookie, mode
+        
+        # Keys derived in different modes don't open each other's tokens
+        os.environ['COOKIE_KEY_KDF'] = 'pbkdf2'
+        try:
+            CookieEncryption(raw_key).decrypt_cookie(v2_token)
+            assert False, "pbkdf2 key opened a raw-key token"
+        except Exception as e:
+            assert "Failed to decrypt cookie" in str(e)
+        
+        os.environ['COOKIE_KEY_KDF'] = 'raw'
+        for bad_key in ('too-short', raw_key.rstrip('='), TEST_KEY):
+            try:
+                CookieEncryption(bad_key)
+                assert False, f"raw mode accepted {bad_key!r}"
+            except ValueError as e:
+                assert "32 url-safe base64-encoded bytes" in str(e)
+        
+        os.environ['COOKIE_KEY_KDF'] = 'scrypt'
+        try:
+            CookieEncryption(raw_key)
+            assert False, "Unknown COOKIE_KEY_KDF was accepted"
+        except ValueError as e:
+            assert "Unsupported COOKIE_KEY_KDF" in str(e)
+    finally:
+        os.environ.pop('COOKIE_KEY_KDF', None)
+    print("✓ Cookie key derivation modes successful")
+
 if __name__ == "__main__":
-    test_cookie_encryption_decryption()
\ No newline at end of file
+    test_cookie_encryption_decryption()
+    test_validity_cache_keeps_no_cookie()
+    test_retrieve_many_logs_one_summary()
+    test_decrypts_older_token_formats()
+    test_rejects_tampered_v2_header()
+    test_key_derivation_modes()
\ No newline at end of file
@@ -224,6 +224,45 @@ def test_database_models():
     
     return True
 
+def test_api_call_log_flush_round_trip(tmp_path):
+    """Test buffered API call logs are written to the database of the app that logged them"""
+    from flask import Flask
+    from models import db, APICallLog
+    from services.dm_analytics_service import DMAnalyticsService
+    
+    apps = []
+    for name in ('first', 'second'):
+        app = Flask(name)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / (name + '.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+        apps.append(app)
+    
+    analytics_service = DMAnalyticsService()
+    for app in apps:
+        with app.app_context():
+            assert analytics_service.log_api_call(
+                endpoint=f"/twitter/send_dm_to_user/{app.name}",
+                method="post",
+                status_code=200,
+                response_time_ms=120,
+                success=True,
+                request_data={"user_id": "12345", "login_cookies": "sensitive_data"}
+            ) is True
+    
+    analytics_service.flush_api_call_logs()
+    
+    for app in apps:
+        with app.app_context():
+            logs = APICallLog.query.all()
+            assert [log.endpoint for log in logs] == [f"/twitter/send_dm_to_user/{app.name}"]
+            assert logs[0].method == "POST"
+            assert logs[0].is_dm is True
+            assert "sensitive_data" not in logs[0].request_data
+            db.session.remove()
+            db.engine.dispose()
+
 def main():
     """Run all tests"""
     print("DM Analytics and Logging Test Suite")
@@ -39,7 +39,7 @@ def test_complete_dm_workflow():
         print("\nTesting analytics service methods:")
         
         # Test log_api_call
-        log_id = analytics_service.log_api_call(
+        logged = analytics_service.log_api_call(
             endpoint="/twitter/send_dm_to_user",
             method="POST",
             status_code=200,
@@ -59,8 +59,8 @@ def test_complete_dm_workflow():
             campaign_id=1
         )
         
-        if log_id:
-            print(f"✓ API call logged successfully (ID: {log_id})")
+        if logged:
+            print("✓ API call queued for logging")
         else:
             print("✗ API call logging failed (expected in test environment)")
         
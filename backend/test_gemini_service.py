@@ -0,0 +1,523 @@
+"""
+Unit tests for Gemini Service
+Tests streaming, batch and concurrent generation against a mocked model
+"""
+
+import json
+import orjson
+import re
+import time
+import pytest
+import threading
+from unittest.mock import Mock, patch
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from flask import Flask
+from google.api_core import exceptions as google_exceptions
+
+from services.gemini_service import (
+    BATCH_CHUNK_SIZE, GEMINI_MAX_RETRIES, GEMINI_RETRY_BASE_DELAY, GEMINI_RETRY_MAX_DELAY,
+    MAX_OUTPUT_TOKENS, GeminiService, TargetProfile, _dm_cache, _extract_json, _validation_cache
+)
+
+
+def make_service(model):
+    """Create a GeminiService that talks to the given mock model"""
+    app = Flask(__name__)
+    app.config['GEMINI_API_KEY'] = None
+    with app.app_context():
+        service = GeminiService()
+    service.model = model
+    return service
+
+
+def chunk(text):
+    """A streamed response chunk"""
+    return Mock(text=text)
+
+
+class TestGenerateDMStream:
+    """Test streamed DM generation"""
+    
+    def setup_method(self):
+        self.model = Mock()
+        self.service = make_service(self.model)
+        self.profile = {'username': 'user1', 'name': 'User One', 'bio': 'Builder'}
+        self.rules = {'tone': 'friendly'}
+    
+    def test_stream_yields_text_chunks(self):
+        """Test the stream is opened with stream=True and yields each chunk's text"""
+        self.model.generate_content.return_value = [chunk('Hi '), chunk(''), chunk('there')]
+        
+        success, stream = self.service.generate_personalized_dm_stream(self.profile, self.rules)
+        
+        assert success is True
+        assert list(stream) == ['Hi ', 'there']
+        assert self.model.generate_content.call_args.kwargs['stream'] is True
+    
+    @patch('services.gemini_service.time.sleep')
+    def test_stream_retries_rate_limit_before_first_chunk(self, mock_sleep):
+        """Test a 429 while opening the stream is retried like other requests"""
+        self.model.generate_content.side_effect = [
+            google_exceptions.ResourceExhausted('quota exceeded'),
+            [chunk('Hello')]
+        ]
+        
+        success, stream = self.service.generate_personalized_dm_stream(self.profile, self.rules)
+        
+        assert success is True
+        assert list(stream) == ['Hello']
+        assert self.model.generate_content.call_count == 2
+        mock_sleep.assert_called_once()
+    
+    def test_stream_open_failure_is_reported(self):
+        """Test a failure to open the stream is returned, not an empty stream"""
+        self.model.generate_content.side_effect = ValueError('blocked prompt')
+        
+        success, error = self.service.generate_personalized_dm_stream(self.profile, self.rules)
+        
+        assert success is False
+        assert error == 'Error: blocked prompt'
+    
+    def test_stream_read_failure_is_raised(self):
+        """Test an error after the first chunk is raised from the iterator"""
+        def response():
+            yield chunk('Hi ')
+            raise google_exceptions.ServiceUnavailable('stream reset')
+        
+        self.model.generate_content.return_value = response()
+        
+        success, stream = self.service.generate_personalized_dm_stream(self.profile, self.rules)
+        
+        assert success is True
+        assert next(stream) == 'Hi '
+        with pytest.raises(google_exceptions.ServiceUnavailable):
+            next(stream)
+    
+    def test_stream_not_configured(self):
+        """Test streaming without a configured model"""
+        service = make_service(None)
+        
+        assert service.generate_personalized_dm_stream(self.profile, self.rules) == (
+            False, "Gemini AI not configured"
+        )
+
+
+class TestMapConcurrently:
+    """Test the bounded fan-out onto the shared pool"""
+    
+    def setup_method(self):
+        self.service = make_service(Mock())
+    
+    @pytest.mark.parametrize('max_workers', [0, -1])
+    def test_rejects_invalid_max_workers(self, max_workers):
+        """Test a worker count below 1 is rejected instead of blocking or failing later"""
+        with pytest.raises(ValueError, match="max_workers must be at least 1"):
+            self.service._map_concurrently(lambda item: item, [1, 2], max_workers)
+    
+    def test_releases_permit_when_submit_fails(self):
+        """Test a failed submit hands its semaphore permit back"""
+        semaphore = threading.BoundedSemaphore(1)
+        executor = Mock()
+        executor.submit.side_effect = RuntimeError('cannot schedule new futures after shutdown')
+        
+        with patch('services.gemini_service.threading.BoundedSemaphore', return_value=semaphore), \
+             patch('services.gemini_service._get_executor', return_value=executor):
+            with pytest.raises(RuntimeError):
+                self.service._map_concurrently(lambda item: item, [1, 2], 1)
+        
+        assert semaphore.acquire(blocking=False) is True
+
+
+class TestSentimentBatch:
+    """Test batched reply sentiment analysis"""
+    
+    def setup_method(self):
+        self.model = Mock()
+        self.service = make_service(self.model)
+        self.replies = ['Tell me more!', 'Stop messaging me', 'ok']
+        self.sentiments = ['positive', 'negative', 'neutral']
+    
+    def single_response(self, prompt):
+        """Answer a single-reply prompt with the sentiment of the reply it quotes"""
+        for reply, sentiment in zip(self.replies, self.sentiments):
+            if f'"{reply}"' in prompt:
+                return Mock(text=json.dumps({'sentiment': sentiment, 'confidence': 0.9}))
+        raise AssertionError(f"Unexpected prompt: {prompt}")
+    
+    def test_out_of_order_indices_map_back_to_replies(self):
+        """Test results are matched to replies by index, not by array position"""
+        self.model.generate_content.return_value = Mock(text=json.dumps([
+            {'index': 2, 'sentiment': 'neutral', 'confidence': 0.5},
+            {'index': 0, 'sentiment': 'positive', 'confidence': 0.9},
+            {'index': 1, 'sentiment': 'negative', 'confidence': 0.8}
+        ]))
+        
+        results = self.service.analyze_reply_sentiment_batch(self.replies)
+        
+        assert results == [
+            (True, {'sentiment': 'positive', 'confidence': 0.9}),
+            (True, {'sentiment': 'negative', 'confidence': 0.8}),
+            (True, {'sentiment': 'neutral', 'confidence': 0.5})
+        ]
+        assert self.model.generate_content.call_count == 1
+    
+    def test_missing_index_falls_back_to_single_replies(self):
+        """Test a response missing a reply re-analyzes the chunk one reply at a time"""
+        def generate_content(prompt, **kwargs):
+            if 'REPLIES TO ANALYZE' in prompt:
+                return Mock(text=json.dumps([
+                    {'index': 0, 'sentiment': 'positive', 'confidence': 0.9},
+                    {'index': 2, 'sentiment': 'neutral', 'confidence': 0.5}
+                ]))
+            return self.single_response(prompt)
+        
+        self.model.generate_content.side_effect = generate_content
+        
+        results = self.service.analyze_reply_sentiment_batch(self.replies)
+        
+        assert [result['sentiment'] for _, result in results] == self.sentiments
+        assert all(success for success, _ in results)
+        assert self.model.generate_content.call_count == 1 + len(self.replies)
+    
+    def test_unparseable_response_falls_back_to_single_replies(self):
+        """Test a batch response that isn't JSON re-analyzes the chunk one reply at a time"""
+        def generate_content(prompt, **kwargs):
+            if 'REPLIES TO ANALYZE' in prompt:
+                return Mock(text='Sorry, I cannot help with that.')
+            return self.single_response(prompt)
+        
+        self.model.generate_content.side_effect = generate_content
+        
+        results = self.service.analyze_reply_sentiment_batch(self.replies)
+        
+        assert [result['sentiment'] for _, result in results] == self.sentiments
+    
+    def test_batch_not_configured(self):
+        """Test batch analysis without a configured model"""
+        service = make_service(None)
+        
+        assert service.analyze_reply_sentiment_batch(self.replies) == [
+            (False, {"error": "Gemini AI not configured"})
+        ] * len(self.replies)
+
+
+class TestConcurrentRequests:
+    """Test per-item requests fanned out onto the shared pool"""
+    
+    def setup_method(self):
+        _dm_cache.clear()
+        self.model = Mock()
+        self.service = make_service(self.model)
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+    
+    def teardown_method(self):
+        _dm_cache.clear()
+    
+    def respond(self, text, delay):
+        """Return a response after a delay, tracking how many requests overlap"""
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(delay)
+        with self.lock:
+            self.active -= 1
+        return Mock(text=text)
+    
+    def test_dms_keep_profile_order(self):
+        """Test element i is the DM for profiles[i] even when earlier requests finish last"""
+        profiles = [TargetProfile(f'user{i}', f'User {i}', 'Builder', 10, 10, False) for i in range(8)]
+        
+        def generate_content(prompt, **kwargs):
+            index = int(re.search(r'@user(\d+)', prompt).group(1))
+            return self.respond(f'Hi user{index}', 0.01 * (len(profiles) - index))
+        
+        self.model.generate_content.side_effect = generate_content
+        
+        results = self.service.generate_personalized_dms_concurrently(
+            profiles, {'tone': 'friendly'}, max_workers=3
+        )
+        
+        assert results == [(True, f'Hi user{i}') for i in range(len(profiles))]
+        assert 1 < self.peak <= 3
+    
+    def test_dm_failure_only_affects_its_profile(self):
+        """Test one failed request doesn't fail the other profiles"""
+        profiles = [{'username': f'user{i}'} for i in range(4)]
+        
+        def generate_content(prompt, **kwargs):
+            index = int(re.search(r'@user(\d+)', prompt).group(1))
+            if index == 2:
+                raise ValueError('blocked prompt')
+            return self.respond(f'Hi user{index}', 0.01)
+        
+        self.model.generate_content.side_effect = generate_content
+        
+        results = self.service.generate_personalized_dms_concurrently(profiles, {'tone': 'friendly'})
+        
+        assert results == [
+            (True, 'Hi user0'),
+            (True, 'Hi user1'),
+            (False, 'Error: blocked prompt'),
+            (True, 'Hi user3')
+        ]
+    
+    def test_sentiments_keep_reply_order(self):
+        """Test element i is the sentiment of replies[i] even when earlier requests finish last"""
+        replies = [f'reply {i}' for i in range(8)]
+        
+        def generate_content(prompt, **kwargs):
+            index = int(re.search(r'"reply (\d+)"', prompt).group(1))
+            return self.respond(json.dumps({'sentiment': 'neutral', 'index': index}),
+                                0.01 * (len(replies) - index))
+        
+        self.model.generate_content.side_effect = generate_content
+        
+        results = self.service.analyze_reply_sentiments(replies, max_workers=3)
+        
+        assert results == [(True, {'sentiment': 'neutral', 'index': i}) for i in range(len(replies))]
+        assert 1 < self.peak <= 3
+
+
+class TestExtractJSON:
+    """Test parsing JSON answers out of Gemini responses"""
+    
+    @pytest.mark.parametrize('text, expected', [
+        ('{"sentiment": "positive"}', {'sentiment': 'positive'}),
+        ('  \n["Hi Ann", "Hi Bob"]\n', ['Hi Ann', 'Hi Bob']),
+    ])
+    def test_plain_json(self, text, expected):
+        """Test a bare JSON answer is parsed as is"""
+        assert _extract_json(text) == expected
+    
+    @pytest.mark.parametrize('text, expected', [
+        ('```json\n{"sentiment": "neutral"}\n```', {'sentiment': 'neutral'}),
+        ('```JSON\n[{"index": 0}]\n```', [{'index': 0}]),
+        ('```\n["Hi Ann"]\n```', ['Hi Ann']),
+    ])
+    def test_fenced_json(self, text, expected):
+        """Test a JSON answer in a markdown code fence is unwrapped"""
+        assert _extract_json(text) == expected
+    
+    @pytest.mark.parametrize('text, expected', [
+        ('Here is the analysis:\n{"sentiment": "negative", "confidence": 0.8}\nLet me know!',
+         {'sentiment': 'negative', 'confidence': 0.8}),
+        ('Sure! The messages are ["Hi Ann", "Hi Bob"] as requested.', ['Hi Ann', 'Hi Bob']),
+        ('Result:\n```json\n{"valid": true}\n```\nDone.', {'valid': True}),
+    ])
+    def test_json_in_prose(self, text, expected):
+        """Test the JSON span is taken from an answer with text around it"""
+        assert _extract_json(text) == expected
+    
+    @pytest.mark.parametrize('text', [
+        'I could not analyze this message.',
+        'The answer is {sentiment: positive}',
+        '',
+    ])
+    def test_no_json_raises(self, text):
+        """Test an answer without parseable JSON raises a decode error"""
+        with pytest.raises(orjson.JSONDecodeError):
+            _extract_json(text)
+
+
+class TestBatchChunking:
+    """Test large batches are split into BATCH_CHUNK_SIZE requests"""
+    
+    def setup_method(self):
+        self.model = Mock()
+        self.service = make_service(self.model)
+        self.profiles = [{'username': f'user{i}', 'name': f'User {i}'} for i in range(BATCH_CHUNK_SIZE + 5)]
+    
+    @staticmethod
+    def dm_batch_response(prompt, **kwargs):
+        """Answer a batch DM prompt with one message per profile in it"""
+        usernames = re.findall(r'"username": "(user\d+)"', prompt)
+        return Mock(text=json.dumps([f'Hi {username}' for username in usernames]))
+    
+    def test_dms_are_split_and_merged_in_order(self):
+        """Test profiles past BATCH_CHUNK_SIZE go in a second request and results keep their order"""
+        self.model.generate_content.side_effect = self.dm_batch_response
+        
+        success, messages = self.service.generate_personalized_dms(self.profiles, {'tone': 'friendly'})
+        
+        assert success is True
+        assert messages == [f'Hi user{i}' for i in range(len(self.profiles))]
+        chunk_sizes = [len(re.findall(r'"username"', call.args[0]))
+                       for call in self.model.generate_content.call_args_list]
+        assert chunk_sizes == [BATCH_CHUNK_SIZE, 5]
+    
+    def test_failed_chunk_fails_batch(self):
+        """Test a chunk with the wrong number of messages fails the whole batch"""
+        self.model.generate_content.side_effect = [
+            self.dm_batch_response(json.dumps([{'username': f'user{i}'} for i in range(BATCH_CHUNK_SIZE)])),
+            Mock(text=json.dumps(['Hi user25']))
+        ]
+        
+        success, error = self.service.generate_personalized_dms(self.profiles, {'tone': 'friendly'})
+        
+        assert success is False
+        assert error == ["Expected 5 messages in response"]
+    
+    def test_sentiments_are_split_and_merged_in_order(self):
+        """Test replies past BATCH_CHUNK_SIZE go in a second request and results keep their order"""
+        replies = [f'reply {i}' for i in range(BATCH_CHUNK_SIZE + 5)]
+        
+        def generate_content(prompt, **kwargs):
+            batch = re.findall(r'"index": (\d+),\s*"message": "([^"]*)"', prompt)
+            return Mock(text=json.dumps([
+                {'index': int(index), 'sentiment': 'neutral', 'message': message} for index, message in batch
+            ]))
+        
+        self.model.generate_content.side_effect = generate_content
+        
+        results = self.service.analyze_reply_sentiment_batch(replies)
+        
+        assert results == [(True, {'sentiment': 'neutral', 'message': reply}) for reply in replies]
+        assert self.model.generate_content.call_count == 2
+
+
+@patch('services.gemini_service.random.uniform', return_value=0)
+@patch('services.gemini_service.time.sleep')
+class TestGenerateContentRetry:
+    """Test transient Gemini errors are retried with exponential backoff"""
+    
+    def setup_method(self):
+        _dm_cache.clear()
+        self.model = Mock()
+        self.service = make_service(self.model)
+    
+    def teardown_method(self):
+        _dm_cache.clear()
+    
+    def test_transient_errors_are_retried(self, mock_sleep, mock_uniform):
+        """Test a request succeeds after transient failures, waiting longer each time"""
+        self.model.generate_content.side_effect = [
+            google_exceptions.ServiceUnavailable('overloaded'),
+            TimeoutError('read timed out'),
+            Mock(text='Hi there')
+        ]
+        
+        success, message = self.service.generate_personalized_dm({'username': 'user1'}, {'tone': 'friendly'})
+        
+        assert (success, message) == (True, 'Hi there')
+        assert self.model.generate_content.call_count == 3
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [
+            GEMINI_RETRY_BASE_DELAY, GEMINI_RETRY_BASE_DELAY * 2
+        ]
+        assert self.model.generate_content.call_args.kwargs['generation_config'] == {
+            'max_output_tokens': MAX_OUTPUT_TOKENS['dm']
+        }
+    
+    def test_gives_up_after_max_retries(self, mock_sleep, mock_uniform):
+        """Test the last transient error is raised once the retries are used up"""
+        self.model.generate_content.side_effect = google_exceptions.ResourceExhausted('quota exceeded')
+        
+        with pytest.raises(google_exceptions.ResourceExhausted):
+            self.service._generate_content('prompt', 'dm')
+        
+        assert self.model.generate_content.call_count == GEMINI_MAX_RETRIES + 1
+        assert mock_sleep.call_count == GEMINI_MAX_RETRIES
+    
+    def test_backoff_is_capped(self, mock_sleep, mock_uniform):
+        """Test the backoff never waits longer than GEMINI_RETRY_MAX_DELAY"""
+        self.model.generate_content.side_effect = google_exceptions.InternalServerError('internal')
+        
+        with patch('services.gemini_service.GEMINI_RETRY_BASE_DELAY', GEMINI_RETRY_MAX_DELAY / 2):
+            with pytest.raises(google_exceptions.InternalServerError):
+                self.service._generate_content('prompt', 'dm')
+        
+        assert [call.args[0] for call in mock_sleep.call_args_list] == (
+            [GEMINI_RETRY_MAX_DELAY / 2] + [GEMINI_RETRY_MAX_DELAY] * (GEMINI_MAX_RETRIES - 1)
+        )
+    
+    def test_other_errors_are_not_retried(self, mock_sleep, mock_uniform):
+        """Test a non-transient error is reported without retrying"""
+        self.model.generate_content.side_effect = google_exceptions.InvalidArgument('bad request')
+        
+        success, error = self.service.generate_personalized_dm({'username': 'user1'}, {'tone': 'friendly'})
+        
+        assert success is False
+        assert error == 'Error: 400 bad request'
+        assert self.model.generate_content.call_count == 1
+        mock_sleep.assert_not_called()
+
+
+class TestMessageQualityChecks:
+    """Test messages failing the local hard checks are rejected without a Gemini request"""
+    
+    def setup_method(self):
+        _validation_cache.clear()
+        self.model = Mock()
+        self.service = make_service(self.model)
+        self.rules = {'avoid_words': ['Crypto', 'guaranteed']}
+    
+    def teardown_method(self):
+        _validation_cache.clear()
+    
+    @pytest.mark.parametrize('message, issue', [
+        ('a' * 281, "Message too long"),
+        ('Hi! Great work! Let us talk!', "Too many exclamation marks"),
+        ('Want to hear about my crypto project?', "Contains avoided word: Crypto"),
+        ('Results are GUARANTEED', "Contains avoided word: guaranteed"),
+    ])
+    def test_hard_issue_rejects_locally(self, message, issue):
+        """Test each hard check rejects a message without calling the model"""
+        success, result = self.service.validate_message_quality(message, self.rules)
+        
+        assert success is True
+        assert result == {"overall_score": 0.0, "issues": [issue], "approved": False}
+        self.model.generate_content.assert_not_called()
+    
+    def test_message_at_limits_goes_to_model(self):
+        """Test a message of 280 characters with two exclamation marks is reviewed by the model"""
+        message = 'Hi! Great work!' + 'a' * 265
+        self.model.generate_content.return_value = Mock(text='{"overall_score": 0.9, "approved": true}')
+        
+        success, result = self.service.validate_message_quality(message, self.rules)
+        
+        assert (success, result) == (True, {"overall_score": 0.9, "approved": True})
+        self.model.generate_content.assert_called_once()
+    
+    @pytest.mark.parametrize('message, rules', [
+        (None, {'tone': 'friendly'}),
+        ('Hello there', {'avoid_words': [42]}),
+    ])
+    def test_invalid_input_is_reported(self, message, rules):
+        """Test a bad message or avoid_words entry is returned as an error, not raised"""
+        success, result = self.service.validate_message_quality(message, rules)
+        
+        assert success is False
+        assert 'error' in result
+        self.model.generate_content.assert_not_called()
+    
+    def test_batch_rejects_locally_and_reviews_the_rest(self):
+        """Test only messages passing the hard checks are sent for review, with results in order"""
+        self.model.generate_content.return_value = Mock(text='[{"overall_score": 0.8, "approved": true}]')
+        
+        success, results = self.service.validate_message_quality_batch(
+            ['Buy crypto now', 'Hi, loved your post', 'a' * 281], self.rules
+        )
+        
+        assert success is True
+        assert [result['issues'] if not result['approved'] else None for result in results] == [
+            ["Contains avoided word: Crypto"], None, ["Message too long"]
+        ]
+        assert '"Hi, loved your post"' in self.model.generate_content.call_args.args[0]
+        assert 'Buy crypto now' not in self.model.generate_content.call_args.args[0]
+    
+    def test_batch_invalid_input_is_reported(self):
+        """Test a bad message in a batch is returned as an error, not raised"""
+        success, results = self.service.validate_message_quality_batch(['Hello', None], self.rules)
+        
+        assert success is False
+        assert 'error' in results[0]
+        self.model.generate_content.assert_not_called()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
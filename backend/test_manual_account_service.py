@@ -0,0 +1,138 @@
+"""
+Unit tests for Manual Account Service
+Tests adding accounts by login cookie against an in-memory database
+"""
+
+import json
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from flask import Flask
+
+from models import db, User, TwitterAccount
+from services.manual_account_service import ManualAccountService
+
+
+def make_cookie(twitter_user_id):
+    """A direct JSON login cookie for the given Twitter user ID"""
+    return json.dumps({
+        'auth_token': 'a' * 20,
+        'twid': f'u={twitter_user_id}',
+        'screen_name': f'user{twitter_user_id}'
+    })
+
+
+@pytest.fixture
+def db_app(monkeypatch):
+    """Create a Flask app backed by an in-memory database"""
+    monkeypatch.setenv('COOKIE_ENCRYPTION_KEY', 'test_cookie_encryption_key')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(app)
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(db_app):
+    """Create the user the accounts are added to"""
+    user = User(email='test@example.com', username='testuser', password_hash='hashed_password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def service(db_app):
+    """Create the service once COOKIE_ENCRYPTION_KEY is set"""
+    return ManualAccountService()
+
+
+class TestAddAccountsByCookie:
+    """Test adding several accounts in one transaction"""
+    
+    def test_account_ids_match_their_cookies(self, service, user):
+        """Test each returned account gets the ID of the row inserted for its cookie"""
+        # Existing rows make the new IDs differ from the batch positions
+        success, _ = service.add_account_by_cookie(user.id, make_cookie(900))
+        assert success is True
+        twitter_user_ids = ['305', '101', '204', '102', '303']
+        
+        success, result = service.add_accounts_by_cookie(
+            user.id, [make_cookie(twitter_user_id) for twitter_user_id in twitter_user_ids]
+        )
+        
+        assert success is True
+        assert result['errors'] == []
+        assert [account['user_id'] for account in result['accounts']] == twitter_user_ids
+        for account in result['accounts']:
+            row = db.session.get(TwitterAccount, account['account_id'])
+            assert row.twitter_user_id == account['user_id']
+            assert row.username == account['username']
+            assert row.created_at.isoformat() == account['created_at']
+            assert service.cookie_manager.retrieve_cookie(row.login_cookie) == make_cookie(row.twitter_user_id)
+    
+    def test_errors_are_reported_by_index(self, service, user):
+        """Test invalid, already connected and repeated cookies are skipped and reported by index"""
+        service.add_account_by_cookie(user.id, make_cookie(2))
+        
+        success, result = service.add_accounts_by_cookie(
+            user.id, [make_cookie(1), 'not a cookie', make_cookie(2), make_cookie(3), make_cookie(1)]
+        )
+        
+        assert success is True
+        assert [account['user_id'] for account in result['accounts']] == ['1', '3']
+        assert [(error['index'], error['error']) for error in result['errors']] == [
+            (1, 'Invalid login cookie format'),
+            (2, 'Account already connected'),
+            (4, 'Account already connected')
+        ]
+        assert TwitterAccount.query.filter_by(user_id=user.id).count() == 3
+    
+    def test_all_cookies_invalid(self, service, user):
+        """Test a batch with no valid cookies adds nothing"""
+        success, result = service.add_accounts_by_cookie(user.id, ['', 'not a cookie'])
+        
+        assert success is False
+        assert result['accounts'] == []
+        assert [error['index'] for error in result['errors']] == [0, 1]
+        assert TwitterAccount.query.count() == 0
+    
+    def test_cookies_without_user_id_are_rejected(self, service, user):
+        """Test cookies whose twid has no user ID are reported, not stored or taken as duplicates"""
+        no_user_id = [
+            json.dumps({'auth_token': 'a' * 20, 'twid': 'u=unknown', 'screen_name': name})
+            for name in ('alice', 'bob')
+        ]
+        
+        success, result = service.add_accounts_by_cookie(user.id, no_user_id + [make_cookie(1)])
+        
+        assert success is True
+        assert [account['user_id'] for account in result['accounts']] == ['1']
+        assert [(error['index'], error['error']) for error in result['errors']] == [
+            (0, 'Unable to extract account information from cookie'),
+            (1, 'Unable to extract account information from cookie')
+        ]
+        
+        success, result = service.add_account_by_cookie(user.id, no_user_id[1])
+        assert success is False
+        assert result['error'] == 'Unable to extract account information from cookie'
+        assert TwitterAccount.query.filter(TwitterAccount.twitter_user_id.is_(None)).count() == 0
+    
+    def test_unknown_user(self, service):
+        """Test adding accounts for a user that doesn't exist"""
+        success, result = service.add_accounts_by_cookie(999, [make_cookie(1)])
+        
+        assert success is False
+        assert result == {'error': 'Validation error', 'details': 'User with ID 999 not found'}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])